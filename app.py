@@ -4,10 +4,28 @@ Deployed on Hugging Face Spaces with Gradio
 Enhanced with dark green/cream/gray premium design
 """
 
+import ast
+import atexit
+import copy
 import gradio as gr
+import numpy as np
+import hashlib
+import httpx
+import json
+import re
+import sqlite3
 import yaml
 import os
-from typing import List, Dict, Optional, Tuple
+import queue
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import MISSING, dataclass, fields
+from typing import Callable, Iterator, List, Dict, NamedTuple, Optional, Tuple
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -20,18 +38,868 @@ USE_HF_MODEL = os.getenv("USE_HF_MODEL", "true").lower() == "true"
 
 if USE_HF_MODEL:
     from smolagents import CodeAgent, InferenceClientModel, tool
+    from smolagents.local_python_executor import LocalPythonExecutor
+    from smolagents.memory import ActionStep
 else:
+    import litellm
     from litellm import completion
 
+    def tool(function):
+        """Keep portfolio tools as plain functions when SmolAgent is not used"""
+        return function
+
 
 # Load portfolio data from YAML file
-def load_portfolio_data() -> Dict:
+def load_portfolio_data(path: str = "portfolio_data.yaml") -> Dict:
     """Load portfolio data from YAML configuration file"""
-    with open("portfolio_data.yaml", "r", encoding="utf-8") as f:
+    with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
 
-PORTFOLIO = load_portfolio_data()
+def portfolio_version(portfolio: Dict) -> str:
+    """Content hash of the portfolio, used for ETags and cache keys"""
+    canonical = json.dumps(portfolio, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+class CategoryDateIndex(NamedTuple):
+    """Chronological order of one category, computed once per load"""
+
+    ordinals: Tuple[Optional[int], ...]  # YYYYMMDD per original index (None if undated)
+    labels: Tuple[str, ...]  # display date per original index
+    order: Tuple[int, ...]  # original indices, oldest to newest
+    rank: Tuple[int, ...]  # rank[original_index] -> position in `order`
+
+
+_DATE_PATTERNS = (
+    re.compile(r"(?P<y>\d{4})(?:-(?P<m>\d{1,2})(?:-(?P<d>\d{1,2}))?)?"),  # 2024, 2023-12
+    re.compile(r"(?:(?P<d>\d{1,2})/)?(?P<m>\d{1,2})/(?P<y>\d{4})"),  # 12/2023, 01/12/2023
+)
+
+
+def date_label(item: Dict) -> str:
+    return str(item.get("date", item.get("year", item.get("period", ""))))
+
+
+def date_ordinal(label: str) -> Optional[int]:
+    """Normalize '2024', '2023-12', '12/2023' or '2023 - 2024' to YYYYMMDD (missing parts = 0)"""
+    matches = [m for m in (p.search(label) for p in _DATE_PATTERNS) if m]
+    if not matches:
+        return None
+    match = min(matches, key=lambda m: m.start())
+    return (
+        int(match["y"]) * 10000
+        + int(match["m"] or 0) * 100
+        + int(match["d"] or 0)
+    )
+
+
+def index_category_dates(items: List[Dict]) -> CategoryDateIndex:
+    labels = tuple(date_label(item) for item in items)
+    ordinals = tuple(date_ordinal(label) for label in labels)
+    # Undated entries (e.g. skills) come first and keep their file order
+    order = tuple(
+        sorted(range(len(items)), key=lambda i: (ordinals[i] is not None, ordinals[i] or 0, i))
+    )
+    rank = [0] * len(items)
+    for position, original_index in enumerate(order):
+        rank[original_index] = position
+    return CategoryDateIndex(ordinals, labels, order, tuple(rank))
+
+
+def build_date_index(portfolio: Dict) -> Dict[str, CategoryDateIndex]:
+    return {
+        category: index_category_dates(items)
+        for category, items in portfolio.items()
+        if isinstance(items, list)
+    }
+
+
+# Typed, slotted in-memory model of the portfolio entries
+CATEGORIES = ("experiences", "skills", "certifications", "education")
+
+
+class PortfolioSchemaError(ValueError):
+    """portfolio_data.yaml does not match the expected schema"""
+
+
+@dataclass(frozen=True, slots=True)
+class CardFields:
+    """Display fields of a carousel card, derived once at load"""
+
+    icon: str
+    title: str
+    subtitle: str
+    description: str
+    duration: str
+    impact: str
+    badges: Tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class ExperienceRecord:
+    id: str
+    title: str
+    client: str
+    description: str
+    technologies: Tuple[str, ...]
+    card: CardFields
+    duration: str = ""
+    date: str = ""
+    period: str = ""
+    icon: str = ""
+    impact: str = ""
+    sector: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class SkillSetRecord:
+    category: str
+    skills: Tuple[str, ...]
+    card: CardFields
+    icon: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class CertificationRecord:
+    name: str
+    issuer: str
+    card: CardFields
+    id: str = ""
+    year: str = ""
+    date: str = ""
+    icon: str = ""
+    description: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class EducationRecord:
+    school: str
+    degree: str
+    card: CardFields
+    id: str = ""
+    year: str = ""
+    date: str = ""
+    icon: str = ""
+    description: str = ""
+    achievement: Optional[str] = None
+    focus: Optional[str] = None
+
+
+RECORD_TYPES = {
+    "experiences": ExperienceRecord,
+    "skills": SkillSetRecord,
+    "certifications": CertificationRecord,
+    "education": EducationRecord,
+}
+
+
+def card_fields(item: Dict) -> CardFields:
+    """Resolve the card fallbacks (client/issuer/school, duration/year...) once"""
+    return CardFields(
+        icon=item.get("icon", "📌"),
+        title=item.get("title", ""),
+        subtitle=item.get("client", item.get("issuer", item.get("school", ""))),
+        description=item.get("description", item.get("focus", "")),
+        duration=item.get("duration", item.get("year", "")),
+        impact=item.get("impact", ""),
+        badges=tuple(item.get("technologies", item.get("skills", []))[:6]),
+    )
+
+
+def build_record(category: str, position: int, item: Dict):
+    """Validate one YAML entry and freeze it into its category's record type"""
+    record_type = RECORD_TYPES[category]
+    where = f"{category}[{position}]"
+    if not isinstance(item, dict):
+        raise PortfolioSchemaError(f"{where}: expected a mapping, got {type(item).__name__}")
+
+    values = {"card": card_fields(item)}
+    for field in fields(record_type):
+        if field.name == "card":
+            continue
+        if field.name not in item:
+            if field.default is MISSING:
+                raise PortfolioSchemaError(f"{where}: missing required field '{field.name}'")
+            continue
+
+        value = item[field.name]
+        if field.name in ("technologies", "skills"):
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                raise PortfolioSchemaError(f"{where}.{field.name}: expected a list of strings")
+            value = tuple(value)
+        elif value is not None:
+            value = str(value).strip()
+        values[field.name] = value
+
+    return record_type(**values)
+
+
+def build_records(portfolio: Dict) -> Dict[str, List]:
+    """Validate the whole portfolio at load; schema errors surface here, not at render"""
+    records = {}
+    for category in CATEGORIES:
+        items = portfolio.get(category) or []
+        if not isinstance(items, list):
+            raise PortfolioSchemaError(f"{category}: expected a list")
+        records[category] = [
+            build_record(category, position, item) for position, item in enumerate(items)
+        ]
+    return records
+
+
+def record_data(record) -> Dict:
+    """JSON-ready data fields of a record (display fields excluded)"""
+    data = {}
+    for field in fields(record):
+        value = getattr(record, field.name)
+        if field.name == "card" or value is None:
+            continue
+        data[field.name] = list(value) if isinstance(value, tuple) else value
+    return data
+
+
+
+class Metrics:
+    """Thread-safe in-process counters, timings and gauges exposed on /metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._gauges: Dict[str, Callable[[], Dict]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record one duration sample (count / total / max)"""
+        with self._lock:
+            timing = self._timings.setdefault(
+                name, {"count": 0, "total_s": 0.0, "max_s": 0.0}
+            )
+            timing["count"] += 1
+            timing["total_s"] += seconds
+            timing["max_s"] = max(timing["max_s"], seconds)
+
+    def register_gauge(self, name: str, fn: Callable[[], Dict]) -> None:
+        """Register a callable evaluated lazily on every snapshot"""
+        self._gauges[name] = fn
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+            timings = {
+                name: {**t, "avg_s": t["total_s"] / t["count"] if t["count"] else 0.0}
+                for name, t in self._timings.items()
+            }
+        gauges = {}
+        for name, fn in self._gauges.items():
+            try:
+                gauges[name] = fn()
+            except Exception as e:
+                gauges[name] = {"error": str(e)}
+        return {"counters": counters, "timings": timings, "gauges": gauges}
+
+
+METRICS = Metrics()
+
+
+# Memory telemetry: periodic RSS / tracemalloc samples, per-component sizes
+# and eviction of the caches above a soft limit
+MEMORY_SAMPLE_SECONDS = float(os.getenv("MEMORY_SAMPLE_SECONDS", "60"))
+MEMORY_HISTORY = int(os.getenv("MEMORY_HISTORY", "240"))
+MEMORY_TRACEMALLOC = os.getenv("MEMORY_TRACEMALLOC", "false").lower() == "true"
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "1"))
+# Unset: 80% of the container limit when known; 0 disables eviction
+MEMORY_SOFT_LIMIT_MB = os.getenv("MEMORY_SOFT_LIMIT_MB", "")
+# Minimum pause between two evictions, so a stubborn RSS does not empty the caches every sample
+MEMORY_EVICT_COOLDOWN_SECONDS = float(os.getenv("MEMORY_EVICT_COOLDOWN_SECONDS", "600"))
+# Eviction aims below the soft limit (hysteresis), not just under it
+MEMORY_RELIEF_TARGET = 0.9
+
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Resident set size of this process, None where /proc is missing (the
+    getrusage fallback is the peak RSS, which never goes down: useless to
+    judge whether an eviction freed anything).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def container_memory_limit() -> Optional[int]:
+    """cgroup memory limit (v2, then v1), None when unlimited or unknown"""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path, "r") as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 60:
+            return int(value)
+    return None
+
+
+class MemoryMonitor:
+    """
+    Samples RSS and component sizes every interval and keeps their history.
+
+    Components register a size function and, when they can give memory
+    back, an evict function. Above the soft limit, non-empty components are
+    evicted in registration order until their measured sizes cover the
+    excess over MEMORY_RELIEF_TARGET of the limit; eviction stops early
+    when dropping one did not lower RSS (the allocator kept the pages) and
+    then waits MEMORY_EVICT_COOLDOWN_SECONDS before trying again. With
+    tracing on, each sample also takes a tracemalloc snapshot, so reports
+    can list the allocation sites that grew since the previous sample or
+    since startup.
+    """
+
+    def __init__(self, interval: float, history: int, soft_limit: Optional[int], trace: bool):
+        self.interval = interval
+        self.soft_limit = soft_limit
+        self.hard_limit = container_memory_limit()
+        self.trace = trace
+        self._lock = threading.Lock()
+        self._components: Dict[str, Tuple[Callable[[], int], Optional[Callable[[], None]], bool]] = {}
+        self._samples: "deque[Dict]" = deque(maxlen=history)
+        self._baseline = None
+        self._previous = None
+        self._latest = None
+        self._cooldown_until = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def register_component(
+        self,
+        name: str,
+        size_fn: Callable[[], int],
+        evict_fn: Optional[Callable[[], None]] = None,
+        resident: bool = True,
+    ) -> None:
+        """resident=False for data kept on disk (reported, never evicted)"""
+        self._components[name] = (size_fn, evict_fn, resident)
+
+    def component_sizes(self) -> Dict[str, Optional[int]]:
+        sizes = {}
+        for name, (size_fn, _, _) in self._components.items():
+            try:
+                sizes[name] = int(size_fn())
+            except Exception as e:
+                print(f"Memory size of {name} failed: {e}")
+                sizes[name] = None
+        return sizes
+
+    def _take_trace(self) -> None:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            )
+        )
+        with self._lock:
+            if self._baseline is None:
+                self._baseline = snapshot
+            self._previous, self._latest = self._latest, snapshot
+
+    def sample(self) -> Dict:
+        """Record one sample, evicting first if RSS is over the soft limit"""
+        rss = current_rss_bytes()
+        evicted = []
+        # Without a current RSS there is no pressure to judge: sizes are still reported
+        if rss is not None and self.soft_limit and rss > self.soft_limit and time.time() >= self._cooldown_until:
+            evicted = self.relieve()
+            rss = current_rss_bytes()
+        if self.trace:
+            self._take_trace()
+        sample = {
+            "time": time.time(),
+            "rss_bytes": rss,
+            "components": self.component_sizes(),
+            "evicted": evicted,
+        }
+        with self._lock:
+            self._samples.append(sample)
+        return sample
+
+    def relieve(self) -> List[str]:
+        """Evict components, in registration order, until their sizes cover the excess RSS"""
+        import gc
+
+        rss = current_rss_bytes()
+        if rss is None:
+            return []
+        sizes = self.component_sizes()
+        excess = rss - int(self.soft_limit * MEMORY_RELIEF_TARGET)
+        evicted = []
+        for name, (_, evict_fn, resident) in self._components.items():
+            if excess <= 0:
+                break
+            if evict_fn is None or not resident or not sizes.get(name):
+                continue
+            evict_fn()
+            gc.collect()
+            evicted.append(name)
+            METRICS.incr(f"memory.evictions.{name}")
+            after = current_rss_bytes()
+            if after is None or after >= rss:
+                # Nothing went back to the OS: evicting more would only cost cache hits
+                METRICS.incr("memory.evictions.ineffective")
+                break
+            excess -= sizes[name]
+            rss = after
+        self._cooldown_until = time.time() + MEMORY_EVICT_COOLDOWN_SECONDS
+        print(f"Memory over soft limit, evicted: {', '.join(evicted) or 'nothing'}")
+        return evicted
+
+    def diff(self, against: str = "previous", top: int = 15) -> List[Dict]:
+        """Allocation sites that grew the most since the previous sample or the baseline"""
+        with self._lock:
+            latest = self._latest
+            reference = self._baseline if against == "baseline" else self._previous
+        if latest is None or reference is None:
+            return []
+        return [
+            {
+                "where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count_diff": stat.count_diff,
+            }
+            for stat in latest.compare_to(reference, "lineno")[:top]
+        ]
+
+    def report(self, against: str = "previous", top: int = 15) -> Dict:
+        """Fresh sample plus history and the tracemalloc diff, for /admin/memory"""
+        current = self.sample()
+        with self._lock:
+            history = [
+                {"time": s["time"], "rss_bytes": s["rss_bytes"], "evicted": s["evicted"]}
+                for s in self._samples
+            ]
+            first = self._samples[0]
+        return {
+            "rss_bytes": current["rss_bytes"],
+            "rss_growth_bytes": (
+                current["rss_bytes"] - first["rss_bytes"]
+                if current["rss_bytes"] is not None and first["rss_bytes"] is not None
+                else None
+            ),
+            "soft_limit_bytes": self.soft_limit,
+            "hard_limit_bytes": self.hard_limit,
+            "components": {
+                name: size for name, size in current["components"].items() if self._components[name][2]
+            },
+            "on_disk": {
+                name: size for name, size in current["components"].items() if not self._components[name][2]
+            },
+            "history": history,
+            "tracemalloc": self.trace,
+            "diff_against": against,
+            "diff": self.diff(against, top),
+        }
+
+    def stats(self) -> Dict:
+        """Last sample, without measuring again (for /metrics)"""
+        with self._lock:
+            last = self._samples[-1] if self._samples else None
+        return {
+            "rss_bytes": last["rss_bytes"] if last else current_rss_bytes(),
+            "soft_limit_bytes": self.soft_limit,
+            "components": last["components"] if last else {},
+        }
+
+    def start(self) -> None:
+        """Sample in a daemon thread (tracemalloc slows allocations: off by default)"""
+        if self._thread is not None or self.interval <= 0:
+            return
+        if self.trace:
+            import tracemalloc
+
+            tracemalloc.start(MEMORY_TRACE_FRAMES)
+
+        def loop() -> None:
+            while True:
+                try:
+                    self.sample()
+                except Exception as e:
+                    print(f"Memory sample failed: {e}")
+                time.sleep(self.interval)
+
+        self._thread = threading.Thread(target=loop, name="memory-monitor", daemon=True)
+        self._thread.start()
+
+
+def _soft_limit_bytes() -> Optional[int]:
+    if MEMORY_SOFT_LIMIT_MB:
+        return int(float(MEMORY_SOFT_LIMIT_MB) * 1024 * 1024) or None
+    hard = container_memory_limit()
+    return int(hard * 0.8) if hard else None
+
+
+MEMORY = MemoryMonitor(MEMORY_SAMPLE_SECONDS, MEMORY_HISTORY, _soft_limit_bytes(), MEMORY_TRACEMALLOC)
+METRICS.register_gauge("memory", MEMORY.stats)
+
+
+# Shared keep-alive HTTP pools for every LLM call (LiteLLM and Hugging Face)
+HTTP_POOL_CONFIG = {
+    "max_connections": int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "20")),
+    "max_keepalive_connections": int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "10")),
+    "keepalive_expiry": float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "120")),
+    "timeout": float(os.getenv("HTTP_TIMEOUT", "60")),
+    "http2": os.getenv("HTTP2_ENABLED", "true").lower() == "true",
+}
+
+try:
+    import h2  # noqa: F401  (HTTP/2 support for httpx)
+except ImportError:
+    HTTP_POOL_CONFIG["http2"] = False
+
+
+def _trace_connection(event: str, info: Dict, started: Dict) -> None:
+    """httpcore trace hook: count new connections and time TCP+TLS setup"""
+    if event == "connection.connect_tcp.started":
+        started["t"] = time.perf_counter()
+        METRICS.incr("http.connections_opened")
+    elif event in ("connection.start_tls.complete", "connection.connect_tcp.complete"):
+        if "t" in started:
+            # For HTTPS the TLS event closes the measurement, so keep the latest
+            started["elapsed"] = time.perf_counter() - started["t"]
+    elif event.endswith("send_request_headers.started") and "elapsed" in started:
+        METRICS.observe("http.connect", started.pop("elapsed"))
+        started.pop("t", None)
+
+
+def _on_http_request(request: httpx.Request) -> None:
+    METRICS.incr("http.requests")
+    started: Dict = {}
+    request.extensions["trace"] = lambda event, info: _trace_connection(
+        event, info, started
+    )
+
+
+async def _on_async_http_request(request: httpx.Request) -> None:
+    METRICS.incr("http.requests")
+    started: Dict = {}
+
+    async def trace(event: str, info: Dict) -> None:
+        _trace_connection(event, info, started)
+
+    request.extensions["trace"] = trace
+
+
+def _http_client_kwargs() -> Dict:
+    return {
+        "http2": HTTP_POOL_CONFIG["http2"],
+        "timeout": HTTP_POOL_CONFIG["timeout"],
+        "limits": httpx.Limits(
+            max_connections=HTTP_POOL_CONFIG["max_connections"],
+            max_keepalive_connections=HTTP_POOL_CONFIG["max_keepalive_connections"],
+            keepalive_expiry=HTTP_POOL_CONFIG["keepalive_expiry"],
+        ),
+    }
+
+
+HTTP_CLIENT = httpx.Client(
+    event_hooks={"request": [_on_http_request]}, **_http_client_kwargs()
+)
+ASYNC_HTTP_CLIENT = httpx.AsyncClient(
+    event_hooks={"request": [_on_async_http_request]}, **_http_client_kwargs()
+)
+HF_SESSION = None
+
+if USE_HF_MODEL:
+    try:
+        # huggingface_hub >= 1.0 talks httpx: hand it the shared client directly
+        from huggingface_hub import set_client_factory
+
+        set_client_factory(lambda: HTTP_CLIENT)
+    except ImportError:
+        # Older huggingface_hub uses requests: share one pooled keep-alive session
+        import requests
+        from huggingface_hub import configure_http_backend
+
+        HF_SESSION = requests.Session()
+        _hf_adapter = requests.adapters.HTTPAdapter(
+            pool_connections=HTTP_POOL_CONFIG["max_keepalive_connections"],
+            pool_maxsize=HTTP_POOL_CONFIG["max_connections"],
+        )
+        HF_SESSION.mount("https://", _hf_adapter)
+        HF_SESSION.mount("http://", _hf_adapter)
+        configure_http_backend(backend_factory=lambda: HF_SESSION)
+else:
+    litellm.client_session = HTTP_CLIENT
+    litellm.aclient_session = ASYNC_HTTP_CLIENT
+
+
+def http_pool_stats() -> Dict:
+    """Connection reuse ratio and connect time across the shared pools"""
+    snapshot = METRICS.snapshot()
+    counters = snapshot["counters"]
+    requests_sent = counters.get("http.requests", 0)
+    opened = counters.get("http.connections_opened", 0)
+
+    if HF_SESSION is not None:
+        # urllib3 pools keep their own request/connection counts
+        for adapter in set(HF_SESSION.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    requests_sent += pool.num_requests
+                    opened += pool.num_connections
+
+    connect = snapshot["timings"].get("http.connect", {})
+    return {
+        "http2": HTTP_POOL_CONFIG["http2"],
+        "max_connections": HTTP_POOL_CONFIG["max_connections"],
+        "requests": requests_sent,
+        "connections_opened": opened,
+        "reuse_ratio": round(1 - opened / requests_sent, 3) if requests_sent else None,
+        "connect_avg_ms": round(connect.get("avg_s", 0) * 1000, 1),
+        "connect_max_ms": round(connect.get("max_s", 0) * 1000, 1),
+    }
+
+
+METRICS.register_gauge("http_pool", http_pool_stats)
+
+
+def _prewarm_urls() -> List[str]:
+    configured = os.getenv("HTTP_PREWARM_URLS")
+    if configured:
+        return [url.strip() for url in configured.split(",") if url.strip()]
+    if USE_HF_MODEL:
+        return ["https://router.huggingface.co", "https://huggingface.co"]
+
+    model_name = os.getenv("LITELLM_MODEL", "gpt-4o-mini")
+    if model_name.startswith("azure/"):
+        return [os.getenv("AZURE_API_BASE", "")] if os.getenv("AZURE_API_BASE") else []
+    if model_name.startswith("claude") or model_name.startswith("anthropic/"):
+        return ["https://api.anthropic.com"]
+    return [os.getenv("OPENAI_API_BASE", "https://api.openai.com")]
+
+
+def prewarm_http_pools() -> None:
+    """Open the provider connections (TCP + TLS) before the first chat turn"""
+    session = HF_SESSION or HTTP_CLIENT
+    for url in _prewarm_urls():
+        started = time.perf_counter()
+        try:
+            session.head(url, timeout=HTTP_POOL_CONFIG["timeout"])
+            METRICS.observe("http.prewarm", time.perf_counter() - started)
+        except Exception as e:
+            print(f"HTTP pre-warm failed for {url}: {e}")
+
+
+# Opt-in sampling profiler: flamegraphs of selected handler calls
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.1"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", ".cache/flamegraphs")
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "50"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILE_REQUEST_HEADER = "x-profile"  # value must be ADMIN_TOKEN
+FLAME_WIDTH, FLAME_ROW = 1200, 16
+
+_PROFILING = threading.local()
+_PROFILING_LOCK = threading.Lock()
+
+
+class StackSampler:
+    """
+    Statistical profiler for one thread, plus the worker threads it hands
+    work to (see follow): a daemon thread reads their current frames every
+    interval and counts the folded call stacks.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_ids = {thread_id}
+        self.interval = interval
+        self.counts: Dict[str, int] = defaultdict(int)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        import sys
+
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in tuple(self.thread_ids):
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if stack:
+                    self.counts[";".join(reversed(stack))] += 1
+
+    @contextmanager
+    def follow(self, thread_id: int) -> Iterator[None]:
+        """Also sample thread_id while the block runs"""
+        self.thread_ids.add(thread_id)
+        try:
+            yield
+        finally:
+            self.thread_ids.discard(thread_id)
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def flamegraph_svg(counts: Dict[str, int], title: str) -> str:
+    """Self-contained SVG flamegraph (root at the bottom, hover for counts)"""
+    import html
+
+    total = sum(counts.values()) or 1
+    tree: Dict = {}
+    for stack, count in counts.items():
+        level = tree
+        for frame in stack.split(";"):
+            node = level.setdefault(frame, [0, {}])
+            node[0] += count
+            level = node[1]
+
+    rects = []
+
+    def walk(level: Dict, x: float, depth: int) -> None:
+        for name, (count, children) in sorted(level.items()):
+            width = count / total * FLAME_WIDTH
+            if width >= 0.5:
+                rects.append((x, depth, width, name, count))
+                walk(children, x, depth + 1)
+            x += width
+
+    walk(tree, 0.0, 0)
+    height = (max((r[1] for r in rects), default=0) + 1) * FLAME_ROW + 24
+    body = []
+    for x, depth, width, name, count in rects:
+        hue = int(hashlib.md5(name.encode("utf-8")).hexdigest()[:2], 16) % 55
+        label = html.escape(name)
+        text = label if width > 7 * len(name) else ""
+        body.append(
+            f'<g><title>{label} ({count} samples, {count / total:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{height - (depth + 1) * FLAME_ROW}" width="{width:.1f}" '
+            f'height="{FLAME_ROW - 1}" fill="hsl({hue}, 85%, 60%)"/>'
+            f'<text x="{x + 3:.1f}" y="{height - depth * FLAME_ROW - 4}">{text}</text></g>'
+        )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{FLAME_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<text x="4" y="14" font-size="13">{html.escape(title)} - {total} samples</text>'
+        + "".join(body)
+        + "</svg>"
+    )
+
+
+def save_flamegraph(name: str, elapsed: float, counts: Dict[str, int]) -> str:
+    """Write <stamp>-<name>.svg and .folded to PROFILING_DIR, keeping the newest captures"""
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}{int(now * 1000) % 1000:03d}"
+    stem = f"{stamp}-{name}-{int(elapsed * 1000)}ms"
+    folded = "\n".join(f"{stack} {count}" for stack, count in sorted(counts.items()))
+    with _PROFILING_LOCK:
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+        with open(os.path.join(PROFILING_DIR, f"{stem}.folded"), "w", encoding="utf-8") as f:
+            f.write(folded + "\n")
+        with open(os.path.join(PROFILING_DIR, f"{stem}.svg"), "w", encoding="utf-8") as f:
+            f.write(flamegraph_svg(counts, f"{name} ({elapsed * 1000:.0f} ms)"))
+
+        stems = sorted({os.path.splitext(n)[0] for n in os.listdir(PROFILING_DIR)})
+        for old in stems[:-PROFILING_MAX_FILES]:
+            for ext in (".svg", ".folded"):
+                path = os.path.join(PROFILING_DIR, old + ext)
+                if os.path.exists(path):
+                    os.remove(path)
+    METRICS.incr("profiling.captures")
+    return stem
+
+
+def _should_profile(args: tuple, kwargs: Dict) -> bool:
+    request = kwargs.get("request") or next((a for a in args if hasattr(a, "headers")), None)
+    if ADMIN_TOKEN and request is not None:
+        import hmac
+
+        header = request.headers.get(PROFILE_REQUEST_HEADER) or ""
+        if hmac.compare_digest(header.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+            return True
+    if PROFILING_ENABLED:
+        import random
+
+        return random.random() < PROFILING_SAMPLE_RATE
+    return False
+
+
+# The sampler of the profiled handler; copied along with the context into worker threads
+_ACTIVE_SAMPLER: ContextVar[Optional[StackSampler]] = ContextVar("active_sampler", default=None)
+
+
+def follows_sampler(fn):
+    """Sample the thread running fn too when a profiled handler handed it the call"""
+    from functools import wraps
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        sampler = _ACTIVE_SAMPLER.get()
+        thread_id = threading.get_ident()
+        if sampler is None or thread_id in sampler.thread_ids:
+            return fn(*args, **kwargs)
+        with sampler.follow(thread_id):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+def profiled(name: str):
+    """
+    Sample the decorated handler when profiling is on (PROFILING_ENABLED,
+    PROFILING_SAMPLE_RATE) or the request sends `X-Profile: <ADMIN_TOKEN>`.
+
+    The wrapper keeps the signature, so Gradio still injects gr.Request.
+    Functions decorated with follows_sampler are sampled on whichever
+    thread runs them (e.g. generate_answer on the LLM pool).
+    """
+    from functools import wraps
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_PROFILING, "active", False) or not _should_profile(args, kwargs):
+                return fn(*args, **kwargs)
+
+            _PROFILING.active = True
+            started = time.perf_counter()
+            sampler = None
+            try:
+                with StackSampler(threading.get_ident(), PROFILING_INTERVAL_MS / 1000) as sampler:
+                    token = _ACTIVE_SAMPLER.set(sampler)
+                    try:
+                        return fn(*args, **kwargs)
+                    finally:
+                        _ACTIVE_SAMPLER.reset(token)
+            finally:
+                _PROFILING.active = False
+                if sampler is not None:  # None if the sampler thread failed to start
+                    save_flamegraph(name, time.perf_counter() - started, sampler.counts)
+
+        return wrapper
+
+    return decorator
+
 
 # Premium color scheme - Luxury Dark Green, Cream, Light Gray
 COLORS = {
@@ -323,6 +1191,43 @@ CUSTOM_CSS = f"""
     font-size: 0.9rem;
 }}
 
+.timeline-more {{
+    position: relative;
+    z-index: 1;
+    align-self: flex-start;
+    padding: 0.1rem 0.6rem;
+    border: 1px dashed {COLORS['border']};
+    border-radius: 12px;
+    background: {COLORS['surface']};
+    color: {COLORS['text_muted']};
+    font-size: 0.8rem;
+    cursor: pointer;
+}}
+
+.timeline-buckets {{
+    display: flex;
+    justify-content: center;
+    flex-wrap: wrap;
+    gap: 0.5rem;
+    margin-top: 2rem;
+}}
+
+.timeline-bucket {{
+    padding: 0.25rem 0.75rem;
+    border: 1px solid {COLORS['border']};
+    border-radius: 12px;
+    color: {COLORS['text_secondary']};
+    font-size: 0.8rem;
+    cursor: pointer;
+    transition: all 0.3s ease;
+}}
+
+.timeline-bucket:hover, .timeline-bucket.active {{
+    background: {COLORS['primary']};
+    border-color: {COLORS['primary']};
+    color: white;
+}}
+
 .nav-button {{
     background: {COLORS['surface']} !important;
     border: 2px solid {COLORS['border']} !important;
@@ -603,321 +1508,2949 @@ input:focus, textarea:focus {{
 """
 
 
-# SmolAgent tools
-@tool
-def list_clement_experiences(
+# Structured portfolio queries shared by the agent tools and the JSON API
+def filter_experiences(
     technology: Optional[str] = None,
     client: Optional[str] = None,
     sector: Optional[str] = None,
-) -> str:
-    """
-    List Clement's professional experiences with optional filters.
-
-    Args:
-        technology: Filter by technology (e.g., 'MCP', 'Azure', 'SmolAgent')
-        client: Filter by client name
-        sector: Filter by sector (e.g., 'Transport', 'Digital Transformation')
-
-    Returns:
-        Formatted string with matching experiences
-    """
-    experiences = PORTFOLIO["experiences"]
+) -> List[ExperienceRecord]:
+    """Experiences matching every given filter (case-insensitive substrings)"""
     results = []
 
-    for exp in experiences:
+    for exp in current_snapshot().records["experiences"]:
         match = True
 
         if technology and match:
-            if not any(
-                technology.lower() in tech.lower()
-                for tech in exp.get("technologies", [])
-            ):
+            if not any(technology.lower() in tech.lower() for tech in exp.technologies):
                 match = False
 
         if client and match:
-            if client.lower() not in exp.get("client", "").lower():
+            if client.lower() not in exp.client.lower():
                 match = False
 
         if sector and match:
-            if sector.lower() not in exp.get("sector", "").lower():
+            if sector.lower() not in exp.sector.lower():
                 match = False
 
         if match:
             results.append(exp)
 
+    return results
+
+
+def filter_skills(category: Optional[str] = None) -> List[SkillSetRecord]:
+    """Skill sets whose category contains the given text"""
+    skills_data = current_snapshot().records["skills"]
+    if not category:
+        return skills_data
+    return [s for s in skills_data if category.lower() in s.category.lower()]
+
+
+# Tool output format fed back to the agent: "compact" rows keyed by id
+# (full entries through get_portfolio_entry), or the original "markdown"
+TOOL_OUTPUT_MODE = os.getenv("TOOL_OUTPUT_MODE", "compact")
+TOOL_DETAIL_LEVELS = ("brief", "summary", "full")
+
+# Row fields per category at the "summary" level; "brief" keeps the first two
+COMPACT_FIELDS = {
+    "experiences": ("id", "title", "client", "duration", "technologies"),
+    "skills": ("category", "skills"),
+    "certifications": ("id", "name", "issuer", "year"),
+    "education": ("id", "school", "degree", "year"),
+}
+COMPACT_MAX_LIST_ITEMS = 5
+
+
+def entry_key(record) -> str:
+    """Id an agent passes to get_portfolio_entry (skill sets go by category)"""
+    return getattr(record, "id", "") or getattr(record, "category", "")
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of a tool output: LiteLLM's tokenizer when loaded, else ~4 characters each"""
+    if not USE_HF_MODEL:
+        return litellm.token_counter(model=os.getenv("LITELLM_MODEL", "gpt-4o-mini"), text=text)
+    return (len(text) + 3) // 4
+
+
+# Set by PlanCache.run to collect what the replayed program's tools returned
+_TOOL_OUTPUTS: ContextVar[Optional[List[str]]] = ContextVar("tool_outputs", default=None)
+
+
+def tool_output(name: str, text: str) -> str:
+    """Count the tokens a tool feeds back into the agent context, per tool"""
+    METRICS.incr(f"tools.{name}.calls")
+    METRICS.incr(f"tools.{name}.tokens", count_tokens(text))
+    outputs = _TOOL_OUTPUTS.get()
+    if outputs is not None:
+        outputs.append(text)
+    return text
+
+
+def _compact_value(value, full: bool) -> str:
+    if isinstance(value, (list, tuple)):
+        if not full and len(value) > COMPACT_MAX_LIST_ITEMS:
+            return ", ".join(value[:COMPACT_MAX_LIST_ITEMS]) + f" +{len(value) - COMPACT_MAX_LIST_ITEMS}"
+        return ", ".join(value)
+    return " ".join(str(value).split())
+
+
+def compact_rows(category: str, records: List, detail: Optional[str] = None) -> str:
+    """
+    One "a | b | c" line per record under a single header naming the fields.
+
+    "brief" lists ids and titles, "summary" (default) the key fields and
+    "full" every field; long texts are left to get_portfolio_entry.
+    """
+    detail = detail if detail in TOOL_DETAIL_LEVELS else "summary"
+    names = COMPACT_FIELDS[category]
+    if detail == "brief":
+        names = names[:2]
+    elif detail == "full":
+        extra = [name for name in record_data(records[0]) if name != "icon"] if records else []
+        names = tuple(dict.fromkeys([*names, *extra]))
+    lines = [f"{category} ({len(records)}): {' | '.join(names)}"]
+    for record in records:
+        data = record_data(record)
+        lines.append(
+            " | ".join(_compact_value(data.get(name, ""), detail == "full") for name in names)
+        )
+    return "\n".join(lines)
+
+
+# SmolAgent tools
+@tool
+def list_experiences(
+    technology: Optional[str] = None,
+    client: Optional[str] = None,
+    sector: Optional[str] = None,
+    detail: Optional[str] = None,
+) -> str:
+    """
+    List the portfolio owner's professional experiences with optional filters.
+
+    Args:
+        technology: Filter by technology (e.g., 'MCP', 'Azure', 'SmolAgent')
+        client: Filter by client name
+        sector: Filter by sector (e.g., 'Transport', 'Digital Transformation')
+        detail: 'brief' (ids and titles), 'summary' (default) or 'full'
+
+    Returns:
+        Formatted string with matching experiences
+    """
+    results = filter_experiences(technology, client, sector)
+
     if not results:
-        return "No experiences found matching the criteria."
+        return tool_output("list_experiences", "No experiences found matching the criteria.")
+    if TOOL_OUTPUT_MODE == "compact":
+        return tool_output("list_experiences", compact_rows("experiences", results, detail))
 
     output = f"Found {len(results)} experience(s):\n\n"
     for exp in results:
-        output += f"**{exp['title']}** at {exp['client']} ({exp['duration']})\n"
-        output += f"Description: {exp['description'][:180]}...\n"
-        output += f"Technologies: {', '.join(exp['technologies'][:5])}\n"
-        output += f"Impact: {exp['impact']}\n\n"
+        output += f"**{exp.title}** at {exp.client} ({exp.duration})\n"
+        output += f"Description: {exp.description[:180]}...\n"
+        output += f"Technologies: {', '.join(exp.technologies[:5])}\n"
+        output += f"Impact: {exp.impact}\n\n"
 
-    return output
+    return tool_output("list_experiences", output)
 
 
 @tool
-def list_clement_skills(category: Optional[str] = None) -> str:
+def list_skills(category: Optional[str] = None, detail: Optional[str] = None) -> str:
     """
-    Get Clement's technical skills by category.
+    Get the portfolio owner's technical skills by category.
 
     Args:
         category: Filter by skill category (e.g., 'Agents', 'GenAI', 'Web')
+        detail: 'brief' (categories only), 'summary' (default) or 'full' (every skill)
 
     Returns:
         Formatted string with skills
     """
-    skills_data = PORTFOLIO.get("skills", [])
-
     if category:
-        matching = [s for s in skills_data if category.lower() in s["category"].lower()]
-        if matching:
-            skill_set = matching[0]
-            return f"**{skill_set['category']}**:\n• " + "\n• ".join(
-                skill_set["skills"]
-            )
-        return f"No skill category found matching '{category}'"
+        matching = filter_skills(category)
+        if not matching:
+            return tool_output("list_skills", f"No skill category found matching '{category}'")
+        if TOOL_OUTPUT_MODE == "compact":
+            # A single category is asked for its skills: list them all
+            return tool_output("list_skills", compact_rows("skills", matching[:1], "full"))
+        skill_set = matching[0]
+        return tool_output(
+            "list_skills", f"**{skill_set.category}**:\n• " + "\n• ".join(skill_set.skills)
+        )
 
-    output = "Clement's Technical Skills:\n\n"
-    for skill_set in skills_data:
-        output += f"**{skill_set['category']}** {skill_set.get('icon', '')}\n"
-        output += "• " + "\n• ".join(skill_set["skills"][:4]) + "\n\n"
+    skills = current_snapshot().records["skills"]
+    if TOOL_OUTPUT_MODE == "compact":
+        return tool_output("list_skills", compact_rows("skills", skills, detail))
 
-    return output
+    output = "Technical Skills:\n\n"
+    for skill_set in skills:
+        output += f"**{skill_set.category}** {skill_set.icon}\n"
+        output += "• " + "\n• ".join(skill_set.skills[:4]) + "\n\n"
+
+    return tool_output("list_skills", output)
 
 
 @tool
-def list_clement_certifications() -> str:
-    """Get all of Clement's certifications"""
-    certs = PORTFOLIO.get("certifications", [])
+def list_certifications(detail: Optional[str] = None) -> str:
+    """
+    Get all of the portfolio owner's certifications
+
+    Args:
+        detail: 'brief' (ids and names), 'summary' (default) or 'full'
+    """
+    certifications = current_snapshot().records["certifications"]
+    if TOOL_OUTPUT_MODE == "compact":
+        return tool_output(
+            "list_certifications", compact_rows("certifications", certifications, detail)
+        )
 
-    output = "Clement's Certifications:\n\n"
-    for cert in certs:
-        output += f"• **{cert['name']}** - {cert['issuer']} ({cert['year']})\n"
-        output += f"  {cert['description']}\n\n"
+    output = "Certifications:\n\n"
+    for cert in certifications:
+        output += f"• **{cert.name}** - {cert.issuer} ({cert.year})\n"
+        output += f"  {cert.description}\n\n"
 
-    return output
+    return tool_output("list_certifications", output)
 
 
 @tool
-def list_clement_education() -> str:
-    """Get Clement's educational background"""
-    education = PORTFOLIO.get("education", [])
+def list_education(detail: Optional[str] = None) -> str:
+    """
+    Get the portfolio owner's educational background
+
+    Args:
+        detail: 'brief' (ids and schools), 'summary' (default) or 'full'
+    """
+    education = current_snapshot().records["education"]
+    if TOOL_OUTPUT_MODE == "compact":
+        return tool_output("list_education", compact_rows("education", education, detail))
 
-    output = "Clement's Education:\n\n"
+    output = "Education:\n\n"
     for edu in education:
-        output += f"**{edu['school']}** - {edu['degree']} ({edu['year']})\n"
-        if "achievement" in edu:
-            output += f"  Achievement: {edu['achievement']}\n"
-        if "focus" in edu:
-            output += f"  Focus: {edu['focus']}\n"
+        output += f"**{edu.school}** - {edu.degree} ({edu.year})\n"
+        if edu.achievement is not None:
+            output += f"  Achievement: {edu.achievement}\n"
+        if edu.focus is not None:
+            output += f"  Focus: {edu.focus}\n"
         output += "\n"
 
-    return output
+    return tool_output("list_education", output)
 
 
 @tool
-def analyze_profile_match(requirements: str) -> str:
+def get_portfolio_entry(entry_id: str) -> str:
     """
-    Analyze how Clement's profile matches specific requirements.
+    Full details of one portfolio entry, for the few entries whose complete
+    description, impact or skill list the answer needs.
 
     Args:
-        requirements: Job description or project requirements
+        entry_id: Id from a previous tool result (e.g. 'exp1', 'cert2', 'edu1'), or a skill category
 
     Returns:
-        Analysis of profile match with recommendations
+        Every field of the entry, one per line
     """
-    req_lower = requirements.lower()
-    matches = {"experiences": [], "skills": [], "strength": 0}
+    wanted = entry_id.strip().casefold()
+    records = current_snapshot().records
+    for category in CATEGORIES:
+        for record in records[category]:
+            if entry_key(record).casefold() == wanted:
+                lines = [f"category: {category}"] + [
+                    f"{name}: {_compact_value(value, True)}"
+                    for name, value in record_data(record).items()
+                    if name != "icon"
+                ]
+                return tool_output("get_portfolio_entry", "\n".join(lines))
+
+    known = ", ".join(entry_key(record) for category in CATEGORIES for record in records[category])
+    return tool_output("get_portfolio_entry", f"No entry '{entry_id}'. Known ids: {known}")
+
+
+class ProfileMatchIndex:
+    """Pre-lowered experience and skill texts, built once per portfolio load"""
+
+    def __init__(self, portfolio: Dict):
+        self.experiences = [
+            (
+                exp.get("id", ""),
+                exp["title"],
+                f"{exp['title']} {exp['description']}".lower(),
+                " ".join(exp["technologies"]).lower(),
+            )
+            for exp in portfolio["experiences"]
+        ]
+        self.skills = [
+            (skill, skill.lower())
+            for skill_set in portfolio.get("skills", [])
+            for skill in skill_set["skills"]
+        ]
+
+    def score(self, requirements: str) -> Dict:
+        """Score requirements: +3 per matching experience, +1 per matching skill"""
+        words = requirements.lower().split()
+        matches = {"experiences": [], "skills": [], "strength": 0}
+
+        for exp_id, title, exp_text, techs_text in self.experiences:
+            hits = sum(1 for word in words if word in exp_text or word in techs_text)
+            if hits:
+                matches["experiences"].append({"id": exp_id, "title": title, "hits": hits})
+                matches["strength"] += 3
+
+        for skill, skill_lower in self.skills:
+            if any(word in skill_lower for word in words):
+                matches["skills"].append(skill)
+                matches["strength"] += 1
 
-    # Search experiences
-    for exp in PORTFOLIO["experiences"]:
-        exp_text = f"{exp['title']} {exp['description']}".lower()
-        techs_text = " ".join(exp["technologies"]).lower()
+        return matches
 
-        if any(word in exp_text or word in techs_text for word in req_lower.split()):
-            matches["experiences"].append(exp["title"])
-            matches["strength"] += 3
 
-    # Search skills
-    for skill_set in PORTFOLIO.get("skills", []):
-        for skill in skill_set["skills"]:
-            if any(word in skill.lower() for word in req_lower.split()):
-                matches["skills"].append(skill)
-                matches["strength"] += 1
+
+def match_level(strength: int) -> Tuple[str, str]:
+    """Map a match strength to its (level, assessment line)"""
+    if strength > 15:
+        return "excellent", "✅ **Excellent Match**: Strong alignment with requirements"
+    if strength > 8:
+        return "good", "👍 **Good Match**: Relevant experience and skills"
+    if strength > 3:
+        return "partial", "💡 **Partial Match**: Some relevant experience"
+    return (
+        "learning",
+        "📚 **Learning Opportunity**: Fast learner ready to acquire new skills",
+    )
+
+
+@tool
+def analyze_profile_match(requirements: str) -> str:
+    """
+    Analyze how the portfolio owner's profile matches specific requirements.
+
+    Args:
+        requirements: Job description or project requirements
+
+    Returns:
+        Analysis of profile match with recommendations
+    """
+    matches = current_snapshot().match_index.score(requirements)
+    experiences = [exp["title"] for exp in matches["experiences"]]
+
+    if TOOL_OUTPUT_MODE == "compact":
+        level = match_level(matches["strength"])[0]
+        lines = [f"match: {level} (strength {matches['strength']})"]
+        if matches["experiences"]:
+            lines.append(
+                "experiences: "
+                + "; ".join(f"{exp['id']} {exp['title']}" for exp in matches["experiences"][:5])
+            )
+        if matches["skills"]:
+            lines.append("skills: " + ", ".join(dict.fromkeys(matches["skills"][:8])))
+        return tool_output("analyze_profile_match", "\n".join(lines))
 
     # Build analysis
     output = f"Profile Match Analysis for: {requirements}\n\n"
 
-    if matches["experiences"]:
-        output += f"**Relevant Experiences ({len(matches['experiences'])}):**\n"
-        output += "• " + "\n• ".join(matches["experiences"][:5]) + "\n\n"
+    if experiences:
+        output += f"**Relevant Experiences ({len(experiences)}):**\n"
+        output += "• " + "\n• ".join(experiences[:5]) + "\n\n"
 
     if matches["skills"]:
         output += f"**Matching Skills ({len(matches['skills'])}):**\n"
         output += "• " + "\n• ".join(set(matches["skills"][:8])) + "\n\n"
 
     # Match strength assessment
-    if matches["strength"] > 15:
-        output += "✅ **Excellent Match**: Strong alignment with requirements\n"
-    elif matches["strength"] > 8:
-        output += "👍 **Good Match**: Relevant experience and skills\n"
-    elif matches["strength"] > 3:
-        output += "💡 **Partial Match**: Some relevant experience\n"
-    else:
-        output += (
-            "📚 **Learning Opportunity**: Fast learner ready to acquire new skills\n"
-        )
+    output += match_level(matches["strength"])[1] + "\n"
 
-    return output
+    return tool_output("analyze_profile_match", output)
 
 
-# Initialize agent based on environment
-if USE_HF_MODEL:
-    model = InferenceClientModel(
-        model_id="Qwen/Qwen2.5-Coder-32B-Instruct",
-        temperature=0.7,
-        token=os.getenv("HF_TOKEN"),
-    )
+# Typo-tolerant trigram search across the whole portfolio
+def fold_text(text: str) -> str:
+    """Lowercase, strip accents and punctuation: 'Clément / SmolAgent' -> 'clement smolagent'"""
+    decomposed = unicodedata.normalize("NFKD", str(text).lower())
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9]+", stripped))
+
+
+def trigrams(text: str) -> set:
+    """Word-padded character trigrams of already folded text"""
+    grams = set()
+    for word in text.split():
+        padded = f" {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
 
-    agent = CodeAgent(
-        model=model,
-        tools=[
-            list_clement_experiences,
-            list_clement_skills,
-            list_clement_certifications,
-            list_clement_education,
-            analyze_profile_match,
-        ],
-        max_steps=6,
-        verbosity_level=0,
-    )
+
+# (field, weight) indexed per category; list fields are indexed item by item
+SEARCH_FIELDS = {
+    "experiences": [("title", 3), ("technologies", 2), ("client", 2), ("sector", 1), ("description", 1), ("impact", 1)],
+    "skills": [("category", 3), ("skills", 2)],
+    "certifications": [("name", 3), ("issuer", 2), ("description", 1)],
+    "education": [("degree", 3), ("school", 3), ("focus", 2), ("achievement", 1), ("description", 1)],
+}
+SEARCH_MIN_SCORE = 0.5
+
+
+def entry_label(category: str, item: Dict) -> str:
+    if category == "skills":
+        return item.get("category", "")
+    if category == "certifications":
+        return item.get("name", "")
+    if category == "education":
+        return f"{item.get('degree', '')} - {item.get('school', '')}"
+    return item.get("title", "")
 
 
-def chat_with_agent(message: str, history: List) -> Tuple[str, List]:
+class TrigramIndex:
     """
-    Process chat message using SmolAgent or LiteLLM
+    Accent-folded trigram index over titles, descriptions, technologies,
+    skills, certifications and education, built once per portfolio load.
+
+    A field scores by the share of query trigrams it contains, times its
+    weight; an entry scores by its best field.
+    """
+
+    def __init__(self, portfolio: Dict):
+        self.entries: List[Tuple[str, int, str]] = []  # (category, index, label)
+        self.fields: List[Tuple[int, float, str]] = []  # (entry id, weight, text)
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+
+        for category, names in SEARCH_FIELDS.items():
+            for index, item in enumerate(portfolio.get(category, [])):
+                entry_id = len(self.entries)
+                self.entries.append((category, index, entry_label(category, item)))
+                for name, weight in names:
+                    values = item.get(name) or []
+                    for value in values if isinstance(values, list) else [values]:
+                        self._add_field(entry_id, weight, str(value))
+
+        self.max_weight = max(weight for names in SEARCH_FIELDS.values() for _, weight in names)
+
+    def _add_field(self, entry_id: int, weight: float, text: str) -> None:
+        field_id = len(self.fields)
+        self.fields.append((entry_id, weight, text))
+        for gram in trigrams(fold_text(text)):
+            self.postings[gram].append(field_id)
+
+    def search(self, query: str, limit: int = 5) -> List[Dict]:
+        """Ranked fuzzy hits: [{"category", "index", "label", "score", "matched"}]"""
+        query_grams = trigrams(fold_text(query))
+        if not query_grams:
+            return []
+
+        shared: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            for field_id in self.postings.get(gram, ()):
+                shared[field_id] += 1
+
+        best: Dict[int, Tuple[float, int]] = {}
+        for field_id, count in shared.items():
+            containment = count / len(query_grams)
+            if containment < SEARCH_MIN_SCORE:
+                continue
+            entry_id, weight, _ = self.fields[field_id]
+            score = containment * weight / self.max_weight
+            if entry_id not in best or score > best[entry_id][0]:
+                best[entry_id] = (score, field_id)
+
+        ranked = sorted(best.items(), key=lambda kv: (-kv[1][0], kv[0]))[:limit]
+        return [
+            {
+                "category": self.entries[entry_id][0],
+                "index": self.entries[entry_id][1],
+                "label": self.entries[entry_id][2],
+                "score": round(score, 3),
+                "matched": self.fields[field_id][2],
+            }
+            for entry_id, (score, field_id) in ranked
+        ]
+
+
+
+@tool
+def search_portfolio_entries(query: str) -> str:
+    """
+    Typo- and accent-tolerant search across experiences, skills, certifications
+    and education (e.g. 'Azur', 'smolagent', 'Arts et Metiers').
 
     Args:
-        message: User's message
-        history: Chat history
+        query: Free text to look for
 
     Returns:
-        Tuple of (empty string for input, updated history)
+        Ranked list of matching portfolio entries
     """
-    try:
-        if USE_HF_MODEL:
-            # Use SmolAgent
-            result = agent.run(message)
-            response = (
-                result.get("output", str(result))
-                if isinstance(result, dict)
-                else str(result)
-            )
-        else:
-            # Use LiteLLM
-            context = f"""You are an AI assistant representing Clément Peponnet's GenAI & Agentic AI portfolio.
+    snapshot = current_snapshot()
+    hits = snapshot.search_index.search(query)
+    if not hits:
+        return tool_output("search_portfolio_entries", f"No portfolio entry matches '{query}'.")
 
-Key Information:
-- Expert in GenAI, Agentic AI, and MCP (Model Context Protocol)
-- Tech Lead with experience in multi-agent systems
-- Certifications: {', '.join([cert['name'] for cert in PORTFOLIO['certifications']])}
-- Recent projects: multi-agent systems, MCP servers, GenAI translation MVP
+    if TOOL_OUTPUT_MODE == "compact":
+        lines = ["category | id | label | score"]
+        for hit in hits:
+            record = snapshot.records[hit["category"]][hit["index"]]
+            lines.append(f"{hit['category']} | {entry_key(record)} | {hit['label']} | {hit['score']}")
+        return tool_output("search_portfolio_entries", "\n".join(lines))
 
-Portfolio Summary:
-- {len(PORTFOLIO['experiences'])} professional experiences
-- {len(PORTFOLIO.get('skills', []))} skill categories
-- {len(PORTFOLIO['certifications'])} certifications
+    output = f"Top matches for '{query}':\n\n"
+    for hit in hits:
+        output += f"• [{hit['category']}] **{hit['label']}** (score {hit['score']}) - matched: {hit['matched'][:80]}\n"
+    return tool_output("search_portfolio_entries", output)
 
-Answer questions professionally and highlight relevant experiences."""
 
-            messages = [{"role": "system", "content": context}]
+# Independent tool calls of one agent step, run concurrently
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "4"))
+_TOOL_POOL = ThreadPoolExecutor(TOOL_WORKERS, thread_name_prefix="tool")
 
-            for user_msg, assistant_msg in history:
-                messages.append({"role": "user", "content": user_msg})
-                messages.append({"role": "assistant", "content": assistant_msg})
 
-            messages.append({"role": "user", "content": message})
+def _timed_call(fn, args: Dict) -> Tuple[str, float]:
+    """(output or error, seconds) of one tool call; errors stay in their own section"""
+    started = time.perf_counter()
+    try:
+        result = str(fn(**args))
+    except Exception as e:
+        result = f"Error: {e}"
+    return result, time.perf_counter() - started
 
-            llm_response = completion(
-                model=os.getenv("LITELLM_MODEL", "gpt-4o-mini"),
-                messages=messages,
-                api_key=os.getenv("OPENAI_API_KEY"),
-                temperature=0.7,
-                max_tokens=500,
-            )
 
-            response = llm_response.choices[0].message.content
+@tool
+def run_portfolio_tools_in_parallel(calls: list) -> str:
+    """
+    Run several independent portfolio tools at once and return all their results
+    together, e.g. to compare experiences with certifications in a single step.
 
-        history.append((message, response))
-        return "", history
+    Args:
+        calls: List of {"tool": tool name, "args": {argument: value}} dicts, e.g.
+            [{"tool": "list_experiences", "args": {"technology": "Azure"}},
+             {"tool": "list_certifications", "args": {}}]
 
-    except Exception as e:
-        error_msg = f"I encountered an error: {str(e)}. Please try again."
-        history.append((message, error_msg))
-        return "", history
+    Returns:
+        Each call's output under a "### tool(args)" heading, in the order given
+    """
+    from contextvars import copy_context
+
+    # Every agent tool but this one, so the map cannot drift from PORTFOLIO_TOOLS
+    tools = {
+        getattr(fn, "name", None) or fn.__name__: fn
+        for fn in PORTFOLIO_TOOLS
+        if fn is not run_portfolio_tools_in_parallel
+    }
+    calls = [call if isinstance(call, dict) else {"tool": call} for call in calls]
+    started = time.perf_counter()
+    futures = []
+    for call in calls:
+        fn = tools.get(call.get("tool"))
+        args = call.get("args") or {}
+        if fn is None or not isinstance(args, dict):
+            futures.append(None)
+            continue
+        # Each worker sees the caller's profile and usage context
+        futures.append(_TOOL_POOL.submit(copy_context().run, _timed_call, fn, args))
+
+    sections = []
+    for call, future in zip(calls, futures):
+        args = call.get("args") or {}
+        shown = ", ".join(f"{k}={v!r}" for k, v in args.items()) if isinstance(args, dict) else repr(args)
+        if future is None:
+            result, elapsed = f"Unknown tool or bad args. Available: {', '.join(tools)}", 0.0
+        else:
+            result, elapsed = future.result()
+            METRICS.observe(f"tools.parallel.{call['tool']}", elapsed)
+        sections.append(f"### {call.get('tool')}({shown}) [{elapsed * 1000:.1f} ms]\n{result}")
+    METRICS.observe("tools.parallel", time.perf_counter() - started)
+    return "\n\n".join(sections)
 
 
-# Generate HTML for carousel card
-def generate_card_html(item: Dict, category: str) -> str:
-    """Generate HTML for a portfolio item card"""
+# Local embedding retrieval: grounds the LiteLLM prompt in the top-k entries
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "hashing")
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".cache/embeddings")
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "4"))
+RETRIEVAL_MAX_CHARS = int(os.getenv("RETRIEVAL_MAX_CHARS", "400"))
 
-    icon = item.get("icon", "📌")
-    title = item.get("title", "")
-    subtitle = item.get("client", item.get("issuer", item.get("school", "")))
-    description = item.get("description", item.get("focus", ""))
-    duration = item.get("duration", item.get("year", ""))
-    techs = item.get("technologies", item.get("skills", []))
-    impact = item.get("impact", "")
 
-    tech_badges = "".join(
-        [f'<span class="tech-badge">{tech}</span>' for tech in techs[:6]]
-    )
+class HashingEmbedder:
+    """
+    Dependency-free CPU embedder: signed feature hashing of accent-folded
+    words and their trigrams, so 'Azur' still lands close to 'Azure'.
+    """
 
-    return f"""
-    <div class="card">
-        <div class="card-header">
-            <div class="card-logo">{icon}</div>
-            <div style="flex: 1;">
-                <div class="card-title">{title}</div>
-                {f'<div class="card-subtitle">{subtitle}</div>' if subtitle else ''}
-            </div>
-        </div>
-        <div class="card-content">{description}</div>
-        {f'<div class="card-meta">📅 {duration}</div>' if duration else ''}
-        {f'<div class="card-meta">🎯 {impact}</div>' if impact else ''}
-        <div style="margin-top: auto;">{tech_badges}</div>
-    </div>
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _slot(self, token: str) -> Tuple[int, float]:
+        digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        return digest % self.dim, 1.0 if digest >> 63 else -1.0
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in fold_text(text).split():
+                for token, weight in [(word, 2.0)] + [(gram, 1.0) for gram in trigrams(word)]:
+                    slot, sign = self._slot(token)
+                    vectors[row, slot] += sign * weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class ModelEmbedder:
+    """fastembed or sentence-transformers model, run on CPU"""
+
+    def __init__(self, model_name: str):
+        self.name = model_name
+        try:
+            from fastembed import TextEmbedding
+
+            model = TextEmbedding(model_name)
+            self._encode = lambda texts: np.array(list(model.embed(texts)))
+        except ImportError:
+            from sentence_transformers import SentenceTransformer
+
+            model = SentenceTransformer(model_name, device="cpu")
+            self._encode = lambda texts: model.encode(texts, normalize_embeddings=True)
+        self.dim = int(self._encode(["probe"]).shape[1])
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        vectors = np.asarray(self._encode(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+_EMBEDDER = None
+_EMBEDDER_LOCK = threading.Lock()
+
+
+def get_embedder():
+    """Embedder shared by every profile, loaded on first use"""
+    global _EMBEDDER
+    with _EMBEDDER_LOCK:
+        if _EMBEDDER is None:
+            if EMBEDDING_MODEL == "hashing":
+                _EMBEDDER = HashingEmbedder()
+            else:
+                try:
+                    _EMBEDDER = ModelEmbedder(EMBEDDING_MODEL)
+                except ImportError:
+                    print(f"No fastembed/sentence-transformers for {EMBEDDING_MODEL}, using hashing embedder")
+                    _EMBEDDER = HashingEmbedder()
+        return _EMBEDDER
+
+
+def entry_text(category: str, item: Dict) -> str:
+    """Text embedded for one entry: its label plus the other searchable fields"""
+    parts = [entry_label(category, item)]
+    for name, _ in SEARCH_FIELDS[category]:
+        values = item.get(name) or []
+        values = values if isinstance(values, list) else [values]
+        joined = ", ".join(str(value) for value in values)
+        if joined and joined not in parts[0]:
+            parts.append(f"{name}: {joined}")
+    return ". ".join(parts)
+
+
+class EmbeddingIndex:
+    """
+    One embedding per portfolio entry, in a float32 matrix memory-mapped
+    from EMBEDDING_CACHE_DIR and keyed by profile, version and model, so
+    restarts and worker processes reuse it without re-embedding.
     """
 
+    def __init__(self, name: str, version: str, portfolio: Dict, embedder):
+        self.embedder = embedder
+        self.entries: List[Tuple[str, int, str]] = [
+            (category, index, entry_text(category, item))
+            for category in SEARCH_FIELDS
+            for index, item in enumerate(portfolio.get(category, []))
+        ]
+        shape = (len(self.entries), embedder.dim)
+        if not self.entries:
+            self.vectors = np.zeros(shape, dtype=np.float32)
+            return
+
+        model = re.sub(r"[^A-Za-z0-9_.-]+", "_", embedder.name)
+        path = os.path.join(EMBEDDING_CACHE_DIR, f"{name}-{version}-{model}.f32")
+        if not os.path.exists(path) or os.path.getsize(path) != shape[0] * shape[1] * 4:
+            started = time.perf_counter()
+            vectors = embedder.embed([text for _, _, text in self.entries])
+            os.makedirs(EMBEDDING_CACHE_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            vectors.tofile(tmp_path)
+            os.replace(tmp_path, path)
+            METRICS.observe("embeddings.build", time.perf_counter() - started)
+        self.vectors = np.memmap(path, dtype=np.float32, mode="r", shape=shape)
+
+    def search(self, query: str, k: int = RETRIEVAL_TOP_K) -> List[Tuple[float, str, int, str]]:
+        """Top-k entries by cosine similarity: [(score, category, index, text)]"""
+        k = min(k, len(self.entries))
+        if k <= 0:
+            return []
+        started = time.perf_counter()
+        scores = self.vectors @ self.embedder.embed([query])[0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        METRICS.observe("retrieval.search", time.perf_counter() - started)
+        return [(float(scores[i]), *self.entries[i][:2], self.entries[i][2]) for i in top]
+
+
+def build_chat_context(question: str, snapshot, k: int = RETRIEVAL_TOP_K) -> str:
+    """Prompt block with the k entries closest to the question, each clipped"""
+    lines = []
+    for _, category, _, text in snapshot.embedding_index.search(question, k):
+        if len(text) > RETRIEVAL_MAX_CHARS:
+            text = text[: RETRIEVAL_MAX_CHARS - 1] + "…"
+        lines.append(f"- [{category}] {text}")
+    return "\n".join(lines)
+
+
+# Precomputed translations: build_translations.py writes translations/<lang>.json,
+# mapping the hash of each source text to its translation
+PORTFOLIO_LANGUAGE = os.getenv("PORTFOLIO_LANGUAGE", "fr")
+TRANSLATIONS_DIR = os.getenv("TRANSLATIONS_DIR", "translations")
+LANGUAGE_PARAM = "lang"
+
+# Free-text fields; names, clients, technologies and dates stay as written
+TRANSLATABLE_FIELDS = {
+    "profile": ("title", "headline", "pitch", "summary"),
+    "experiences": ("title", "duration", "description", "impact", "sector"),
+    "skills": ("category",),
+    "certifications": ("description",),
+    "education": ("degree", "focus", "achievement", "description"),
+}
 
-# Generate timeline HTML with click handlers
-def generate_timeline_html(items: List[Dict], active_index: int, category: str) -> str:
-    """Generate HTML for interactive timeline with chronological order"""
 
-    # Sort items by date chronologically (oldest to newest)
-    sorted_items = sorted(
-        enumerate(items),
-        key=lambda x: x[1].get("date", x[1].get("year", x[1].get("period", "0000"))),
-    )
+def text_hash(text: str) -> str:
+    """Content key of a source text: unchanged entries keep their translation"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
 
-    timeline_items = []
-    for original_index, item in sorted_items:
-        date = item.get("date", item.get("year", item.get("period", "")))
-        active_class = "active" if original_index == active_index else ""
 
-        timeline_items.append(
-            f"""
-        <div class="timeline-item {active_class}" onclick="window.jumpToCard({original_index})">
+def _translatable_values(portfolio: Dict) -> Iterator[Tuple[Dict, str]]:
+    """(container, field) pairs holding translatable text"""
+    for section, names in TRANSLATABLE_FIELDS.items():
+        entries = portfolio.get(section) or []
+        for entry in [entries] if isinstance(entries, dict) else entries:
+            for field in names:
+                if entry.get(field):
+                    yield entry, field
+
+
+def translatable_texts(portfolio: Dict) -> List[str]:
+    """Every distinct source text of a portfolio, in file order"""
+    texts = {}
+    for entry, field in _translatable_values(portfolio):
+        value = entry[field]
+        for text in value if isinstance(value, list) else [value]:
+            if isinstance(text, str) and text.strip():
+                texts.setdefault(text, None)
+    return list(texts)
+
+
+def translations_path(language: str) -> str:
+    return os.path.join(TRANSLATIONS_DIR, f"{language}.json")
+
+
+def load_translations(language: str) -> Dict[str, str]:
+    """{text_hash: translation} for a language, empty when not built"""
+    try:
+        with open(translations_path(language), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+_LANGUAGES: Optional[List[str]] = None
+
+
+def available_languages() -> List[str]:
+    """
+    The portfolio's own language plus every language with built translations.
+
+    Listed once, like the snapshots built from them: restart after a build.
+    """
+    global _LANGUAGES
+    if _LANGUAGES is None:
+        languages = [PORTFOLIO_LANGUAGE]
+        if os.path.isdir(TRANSLATIONS_DIR):
+            languages += sorted(
+                name[: -len(".json")]
+                for name in os.listdir(TRANSLATIONS_DIR)
+                if name.endswith(".json") and name[: -len(".json")] != PORTFOLIO_LANGUAGE
+            )
+        _LANGUAGES = languages
+    return _LANGUAGES
+
+
+def translate_portfolio(portfolio: Dict, translations: Dict[str, str]) -> Dict:
+    """
+    Copy of a portfolio with its text fields replaced by their translations.
+
+    Texts missing from the table (not built yet, or edited since) stay in
+    the source language.
+    """
+
+    def translate(text):
+        if not isinstance(text, str):
+            return text
+        return translations.get(text_hash(text), text)
+
+    translated = copy.deepcopy(portfolio)
+    for entry, field in _translatable_values(translated):
+        value = entry[field]
+        entry[field] = [translate(t) for t in value] if isinstance(value, list) else translate(value)
+    return translated
+
+
+def request_language(request) -> str:
+    """?lang= first, then the browser's preferred language, if it has been built"""
+    if request is None:
+        return PORTFOLIO_LANGUAGE
+    wanted = request.query_params.get(LANGUAGE_PARAM) or request.headers.get(
+        "accept-language", ""
+    )
+    # "en-US,en;q=0.9,fr;q=0.8" -> "en"
+    language = wanted.split(",")[0].split(";")[0].split("-")[0].strip().lower()
+    return language if language in available_languages() else PORTFOLIO_LANGUAGE
+
+
+# Per-profile snapshots: one process serves many portfolios (multi-tenant)
+PROFILES_DIR = os.getenv("PROFILES_DIR", "profiles")
+DEFAULT_PROFILE = os.getenv("DEFAULT_PROFILE", "default")
+PROFILE_CACHE_MAX_MB = float(os.getenv("PROFILE_CACHE_MAX_MB", "64"))
+PROFILE_BASE_DOMAIN = os.getenv("PROFILE_BASE_DOMAIN", "")  # e.g. portfolios.example.com
+PROFILE_HEADER = "x-portfolio-profile"
+_PROFILE_NAME = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+# Header, footer and prompt identity; a profile overrides them under `profile:`
+PROFILE_DEFAULTS = {
+    "name": "Clément Peponnet",
+    "title": "Portfolio GenAI & Agentic",
+    "headline": "Expert GenAI | Tech Lead Agents & MCP | Azure AI Engineer",
+    "pitch": "Convaincu par le potentiel de la GenAI et de l'Agentic AI,<br>\n"
+    "j'accompagne mes clients de l'idéation à l'industrialisation",
+    "linkedin": "https://www.linkedin.com/in/clément-peponnet-b26906194",
+    "github": "https://github.com/clemenpep",
+    "summary": [
+        "Expert in GenAI, Agentic AI, and MCP (Model Context Protocol)",
+        "Tech Lead with experience in multi-agent systems",
+        "Recent projects: multi-agent systems, MCP servers, GenAI translation MVP",
+    ],
+    "highlights": [
+        {"icon": "💼", "value": "50+", "label": "Pitchs GenAI"},
+        {"icon": "👥", "value": "6000+", "label": "Utilisateurs produits"},
+    ],
+}
+
+
+class UnknownProfileError(LookupError):
+    """No portfolio file exists for the requested profile"""
+
+
+def deep_sizeof(obj, _seen: Optional[set] = None) -> int:
+    """Approximate retained size of an object graph (bytes)"""
+    import gc
+    import sys
+
+    seen = set() if _seen is None else _seen
+    size, stack = 0, [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, type(sys))) or callable(current):
+            continue
+        seen.add(id(current))
+        size += sys.getsizeof(current)
+        stack.extend(gc.get_referents(current))
+    return size
+
+
+def with_profile_defaults(data: Dict) -> Dict:
+    """The portfolio with its `profile:` section completed by PROFILE_DEFAULTS"""
+    return {**data, "profile": {**PROFILE_DEFAULTS, **(data.get("profile") or {})}}
+
+
+def portfolio_variant(data: Dict, language: str) -> Dict:
+    """The portfolio as served in `language`: the file itself, or its translation"""
+    if language == PORTFOLIO_LANGUAGE:
+        return data
+    return translate_portfolio(with_profile_defaults(data), load_translations(language))
+
+
+class PortfolioSnapshot:
+    """Everything derived from one portfolio file, built once and then read-only"""
+
+    def __init__(self, name: str, data: Dict, language: str = PORTFOLIO_LANGUAGE):
+        self.name = name
+        self.language = language
+        self.data = data
+        self.profile = with_profile_defaults(data)["profile"]
+        self.version = portfolio_version(data)
+        self.records = build_records(data)
+        self.date_index = build_date_index(data)
+        self.match_index = ProfileMatchIndex(data)
+        self.search_index = TrigramIndex(data)
+        self._embedding_index = None
+        self._embedding_lock = threading.Lock()
+        self.size_bytes = deep_sizeof(self)
+
+    @property
+    def embedding_index(self) -> EmbeddingIndex:
+        """Built on the first chat question; the vectors live in a memory-mapped file"""
+        with self._embedding_lock:
+            if self._embedding_index is None:
+                self._embedding_index = EmbeddingIndex(
+                    self.name, self.version, self.data, get_embedder()
+                )
+            return self._embedding_index
+
+
+def profile_path(name: str) -> str:
+    """YAML file of a profile: profiles/<name>.yaml or profiles/<name>/portfolio_data.yaml"""
+    if name == DEFAULT_PROFILE:
+        return "portfolio_data.yaml"
+    if not _PROFILE_NAME.match(name):
+        raise UnknownProfileError(name)
+    for path in (
+        os.path.join(PROFILES_DIR, f"{name}.yaml"),
+        os.path.join(PROFILES_DIR, name, "portfolio_data.yaml"),
+    ):
+        if os.path.isfile(path):
+            return path
+    raise UnknownProfileError(name)
+
+
+class SnapshotCache:
+    """
+    Memory-bounded LRU of loaded profiles.
+
+    Snapshots load lazily on first request, one per (profile, language),
+    and the least recently used ones are evicted once their total size
+    exceeds max_bytes; the default profile in its own language is pinned.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._snapshots: "OrderedDict[Tuple[str, str], PortfolioSnapshot]" = OrderedDict()
+
+    def get(self, name: str, language: str = PORTFOLIO_LANGUAGE) -> PortfolioSnapshot:
+        key = (name, language)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+                METRICS.incr("profiles.hits")
+                return snapshot
+
+            data = portfolio_variant(load_portfolio_data(profile_path(name)), language)
+            snapshot = PortfolioSnapshot(name, data, language)
+            self._snapshots[key] = snapshot
+            METRICS.incr("profiles.loads")
+            self._evict()
+            return snapshot
+
+    def _evict(self) -> None:
+        pinned = (DEFAULT_PROFILE, PORTFOLIO_LANGUAGE)
+        while self.total_bytes() > self.max_bytes:
+            victim = next((k for k in self._snapshots if k != pinned), None)
+            if victim is None or victim == next(reversed(self._snapshots)):
+                break  # never evict the default or the snapshot being served
+            del self._snapshots[victim]
+            METRICS.incr("profiles.evictions")
+
+    def total_bytes(self) -> int:
+        return sum(snapshot.size_bytes for snapshot in self._snapshots.values())
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self.total_bytes()
+
+    def trim(self) -> None:
+        """Drop every snapshot but the pinned one; they reload on next request"""
+        pinned = (DEFAULT_PROFILE, PORTFOLIO_LANGUAGE)
+        with self._lock:
+            for key in [k for k in self._snapshots if k != pinned]:
+                del self._snapshots[key]
+                METRICS.incr("profiles.evictions")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "loaded": [f"{name}:{language}" for name, language in self._snapshots],
+                "bytes": self.total_bytes(),
+                "max_bytes": self.max_bytes,
+            }
+
+
+SNAPSHOTS = SnapshotCache(int(PROFILE_CACHE_MAX_MB * 1024 * 1024))
+METRICS.register_gauge("profiles", SNAPSHOTS.stats)
+_ACTIVE_SNAPSHOT: ContextVar[Optional[PortfolioSnapshot]] = ContextVar(
+    "active_snapshot", default=None
+)
+
+
+def current_snapshot() -> PortfolioSnapshot:
+    """Snapshot of the profile being served (the default one outside requests)"""
+    return _ACTIVE_SNAPSHOT.get() or SNAPSHOTS.get(DEFAULT_PROFILE)
+
+
+@contextmanager
+def use_snapshot(snapshot: PortfolioSnapshot):
+    token = _ACTIVE_SNAPSHOT.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _ACTIVE_SNAPSHOT.reset(token)
+
+
+def activate_profile(request) -> PortfolioSnapshot:
+    """
+    Bind the profile selected by ProfileRoutingMiddleware to this request.
+
+    Called first by every request handler; the binding lives in the
+    handler's own context, so tools run by the agent read the same profile.
+    The snapshot is in the language asked for by the request, when built.
+    """
+    name = DEFAULT_PROFILE
+    if request is not None:
+        name = request.headers.get(PROFILE_HEADER) or DEFAULT_PROFILE
+    snapshot = SNAPSHOTS.get(name, request_language(request))
+    _ACTIVE_SNAPSHOT.set(snapshot)
+    return snapshot
+
+
+class ProfileRoutingMiddleware:
+    """
+    ASGI middleware selecting the profile by path (/p/<name>/...) or by
+    subdomain (<name>.PROFILE_BASE_DOMAIN), forwarded as a request header.
+    A client-sent header is always dropped: only the router selects profiles.
+
+    The /p/<name> prefix is appended to root_path so the Gradio app and the
+    API see the same routes for every profile.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        name = None
+        path = scope["path"]
+        if path.startswith("/p/"):
+            name = path[3:].partition("/")[0]
+            # Starlette routes on path minus root_path
+            scope = {**scope, "root_path": scope.get("root_path", "") + f"/p/{name}"}
+        elif PROFILE_BASE_DOMAIN:
+            host = dict(scope["headers"]).get(b"host", b"").decode("latin-1").split(":")[0]
+            if host.endswith("." + PROFILE_BASE_DOMAIN):
+                name = host[: -len(PROFILE_BASE_DOMAIN) - 1]
+
+        headers = [(k, v) for k, v in scope["headers"] if k != PROFILE_HEADER.encode()]
+        if name is not None:
+            try:
+                profile_path(name)
+            except UnknownProfileError:
+                from starlette.responses import PlainTextResponse
+
+                response = PlainTextResponse(f"Unknown profile '{name}'", status_code=404)
+                return await response(scope, receive, send)
+            headers.append((PROFILE_HEADER.encode(), name.encode()))
+        scope = {**scope, "headers": headers}
+
+        return await self.app(scope, receive, send)
+
+
+# Load and validate the default profile at startup
+SNAPSHOTS.get(DEFAULT_PROFILE)
+
+
+# Batch job-description matching (CLI: batch_match.py, HTTP: POST /api/batch/match)
+# Default: the cores this process may run on (a container may get fewer than cpu_count)
+BATCH_WORKERS = int(
+    os.getenv(
+        "BATCH_WORKERS",
+        str(len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1),
+    )
+)
+# Smaller batches are scored in-process (see iter_batch_matches)
+BATCH_PARALLEL_MIN_ROWS = int(os.getenv("BATCH_PARALLEL_MIN_ROWS", "20000"))
+REQUIREMENT_FIELDS = ("requirements", "job_description", "description", "text")
+
+
+def parse_requirement_rows(text: str, fmt: str = "jsonl") -> List[Dict]:
+    """
+    Parse a CSV or JSONL batch into rows of {"id", "requirements"}.
+
+    CSV files need a header with one of REQUIREMENT_FIELDS (and optionally
+    "id"); JSONL lines may be objects with the same keys or plain strings.
+    """
+    import csv
+    import io
+    import json
+
+    if fmt == "csv":
+        records = list(csv.DictReader(io.StringIO(text)))
+    else:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    rows = []
+    for position, record in enumerate(records, start=1):
+        if isinstance(record, str):
+            record = {"requirements": record}
+        elif not isinstance(record, dict):
+            raise ValueError(f"Row {position} is neither an object nor a string")
+        requirements = next(
+            (record[field] for field in REQUIREMENT_FIELDS if record.get(field)), ""
+        )
+        if not requirements:
+            raise ValueError(
+                f"Row {position} has none of the fields: {', '.join(REQUIREMENT_FIELDS)}"
+            )
+        rows.append({"id": record.get("id") or str(position), "requirements": requirements})
+    return rows
+
+
+def score_batch_row(index: ProfileMatchIndex, row: Dict) -> Dict:
+    """One batch result: the row scored against a prebuilt match index"""
+    matches = index.score(row["requirements"])
+    return {
+        "id": row["id"],
+        "requirements": row["requirements"],
+        "strength": matches["strength"],
+        "level": match_level(matches["strength"])[0],
+        "experiences": sorted(matches["experiences"], key=lambda e: -e["hits"]),
+        "skills": list(dict.fromkeys(matches["skills"])),
+    }
+
+
+_BATCH_POOL = None
+_BATCH_POOL_WORKERS = 0
+# Index each worker got from the initializer, per profile (parent's copy)
+_BATCH_POOL_INDEXES: Dict[str, ProfileMatchIndex] = {}
+# Worker side: set once by _init_batch_worker, read without locks
+_WORKER_INDEXES: Dict[str, ProfileMatchIndex] = {}
+
+
+def _init_batch_worker(indexes: Dict[str, ProfileMatchIndex]) -> None:
+    _WORKER_INDEXES.update(indexes)
+
+
+def _score_batch_chunk(profile: str, rows: List[Dict], index: Optional[ProfileMatchIndex] = None) -> List[Dict]:
+    """Process-pool worker: the chunk's own index, or the one from the initializer"""
+    index = index or _WORKER_INDEXES[profile]
+    return [score_batch_row(index, row) for row in rows]
+
+
+def start_batch_pool(workers: int = BATCH_WORKERS) -> None:
+    """
+    Fork the batch workers with the default profile's match index.
+
+    Call at startup while the process has a single thread: a fork taken
+    later copies locks other threads may hold. Without a started pool
+    (or without fork, e.g. on Windows) batches are scored in-process.
+    """
+    global _BATCH_POOL, _BATCH_POOL_WORKERS
+    import multiprocessing
+
+    if _BATCH_POOL is not None or workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    _BATCH_POOL_INDEXES[DEFAULT_PROFILE] = SNAPSHOTS.get(DEFAULT_PROFILE).match_index
+    _BATCH_POOL = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_init_batch_worker,
+        initargs=(dict(_BATCH_POOL_INDEXES),),
+    )
+    _BATCH_POOL_WORKERS = workers
+    # A fork pool starts every worker on its first task: do it now, not mid-request
+    _BATCH_POOL.submit(int).result()
+
+
+def iter_batch_matches(
+    rows: List[Dict],
+    workers: int = BATCH_WORKERS,
+    rank: bool = False,
+    profile: str = DEFAULT_PROFILE,
+):
+    """
+    Score rows and yield one result dict per row.
+
+    Batches of BATCH_PARALLEL_MIN_ROWS rows or more are split across the
+    worker pool when one was started (start_batch_pool); smaller ones are
+    scored in-process, where a row takes microseconds and shipping it to a
+    worker would cost more. Results stream in input order; with rank=True
+    they are buffered and yielded by decreasing strength, each with its
+    "rank".
+    """
+    index = SNAPSHOTS.get(profile).match_index
+    if _BATCH_POOL is None or workers <= 1 or len(rows) < BATCH_PARALLEL_MIN_ROWS:
+        results = (score_batch_row(index, row) for row in rows)
+    else:
+        from functools import partial
+        from itertools import chain
+
+        workers = min(workers, _BATCH_POOL_WORKERS)
+        size = max(1, len(rows) // (workers * 4))
+        chunks = [rows[start : start + size] for start in range(0, len(rows), size)]
+        # Workers already hold the index unless the profile is another one or was reloaded
+        shipped = None if _BATCH_POOL_INDEXES.get(profile) is index else index
+        score = partial(_score_batch_chunk, profile, index=shipped)
+        results = chain.from_iterable(_BATCH_POOL.map(score, chunks))
+
+    if not rank:
+        yield from results
+        return
+
+    ranked = sorted(results, key=lambda r: -r["strength"])
+    for position, result in enumerate(ranked, start=1):
+        yield {"rank": position, **result}
+
+
+# LLM cassettes: record every model exchange, replay it offline and deterministically
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()  # off | record | replay
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "cassettes/llm.jsonl")
+_SECRET_ARGS = ("api_key", "token", "api_base", "headers")
+
+
+class CassetteMissError(LookupError):
+    """Replay mode met a model request that was never recorded"""
+
+
+class Cassette:
+    """
+    JSONL file of (request key, response) pairs for LiteLLM `completion`
+    and the SmolAgent model's `generate`.
+
+    A request key hashes the model, messages and sampling arguments (never
+    credentials). Replaying a key returns its recorded responses in order,
+    repeating the last one once they run out.
+    """
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._responses: Dict[str, List[Dict]] = defaultdict(list)
+        self._served: Dict[str, int] = defaultdict(int)
+        if mode == "replay":
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._responses[entry["key"]].append(entry["response"])
+
+    @staticmethod
+    def request_key(kind: str, request: Dict) -> str:
+        payload = json.dumps([kind, request], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def wrap(
+        self,
+        kind: str,
+        call: Callable,
+        describe: Callable[[tuple, Dict], Dict],
+        encode: Callable,
+        decode: Callable[[Dict], object],
+    ) -> Callable:
+        """Record or replay `call`; describe(args, kwargs) gives the request to key on"""
+        if self.mode not in ("record", "replay"):
+            return call
+
+        def cassette_call(*args, **kwargs):
+            request = describe(args, kwargs)
+            key = self.request_key(kind, request)
+            if self.mode == "replay":
+                with self._lock:
+                    responses = self._responses.get(key)
+                    if not responses:
+                        raise CassetteMissError(f"No recorded {kind} response for request {key[:12]}")
+                    position = min(self._served[key], len(responses) - 1)
+                    self._served[key] += 1
+                METRICS.incr("cassette.replayed")
+                return decode(responses[position])
+
+            response = call(*args, **kwargs)
+            line = json.dumps(
+                {"key": key, "kind": kind, "request": request, "response": encode(response)},
+                ensure_ascii=False,
+                default=str,
+            )
+            with self._lock:
+                if os.path.dirname(self.path):
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            METRICS.incr("cassette.recorded")
+            return response
+
+        return cassette_call
+
+
+CASSETTE = Cassette(LLM_CASSETTE_PATH, LLM_CASSETTE_MODE)
+
+
+def _describe_completion(args: tuple, kwargs: Dict) -> Dict:
+    return {k: v for k, v in kwargs.items() if k not in _SECRET_ARGS}
+
+
+def _describe_generate(args: tuple, kwargs: Dict) -> Dict:
+    messages = args[0] if args else kwargs.get("messages", [])
+    request = {k: v for k, v in kwargs.items() if k not in ("messages", "tools_to_call_from")}
+    request["model"] = model.model_id
+    request["messages"] = [
+        message if isinstance(message, dict) else {"role": message.role, "content": message.content}
+        for message in messages
+    ]
+    if len(args) > 1:
+        request["stop_sequences"] = args[1]
+    tools = kwargs.get("tools_to_call_from") or []
+    request["tools"] = [tool.name for tool in tools]
+    return request
+
+
+def _encode_chat_message(message) -> Dict:
+    return {
+        "role": message.role,
+        "content": message.content,
+        "tool_calls": [
+            {"id": call.id, "type": call.type, "function": {"name": call.function.name, "arguments": call.function.arguments}}
+            for call in message.tool_calls or []
+        ],
+        "token_usage": message.token_usage.dict() if message.token_usage else None,
+    }
+
+
+def _decode_chat_message(data: Dict):
+    from smolagents.models import ChatMessage
+    from smolagents.monitoring import TokenUsage
+
+    usage = data.get("token_usage")
+    return ChatMessage.from_dict(
+        dict(data),
+        token_usage=TokenUsage(usage["input_tokens"], usage["output_tokens"]) if usage else None,
+    )
+
+
+# Token and cost accounting, with hard budgets per turn, session and day
+USAGE_DB_PATH = os.getenv("USAGE_DB_PATH", ".cache/usage.sqlite3")
+USAGE_FLUSH_SECONDS = float(os.getenv("USAGE_FLUSH_SECONDS", "30"))
+# Session totals kept in memory (LRU); older ones are summed from SQLite again
+USAGE_SESSION_CACHE = int(os.getenv("USAGE_SESSION_CACHE", "4096"))
+BUDGET_MAX_TOKENS_PER_TURN = int(os.getenv("BUDGET_MAX_TOKENS_PER_TURN", "0"))  # 0 = no limit
+BUDGET_MAX_TOKENS_PER_SESSION = int(os.getenv("BUDGET_MAX_TOKENS_PER_SESSION", "0"))
+BUDGET_MAX_TOKENS_PER_DAY = int(os.getenv("BUDGET_MAX_TOKENS_PER_DAY", "0"))
+
+
+class BudgetExceeded(RuntimeError):
+    """A token budget ran out before or during a chat turn"""
+
+    def __init__(self, scope: str):
+        super().__init__(f"token budget per {scope} exhausted")
+        self.scope = scope
+
+
+class TurnCancelled(RuntimeError):
+    """The caller stopped waiting for this chat turn (answer deadline passed)"""
+
+
+class TurnUsage:
+    """Tokens and cost of one chat turn, across every model call it makes"""
+
+    def __init__(self, session: Optional[str]):
+        self.session = session
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+        self.calls = 0
+        self.exceeded: Optional[str] = None
+
+    @property
+    def tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+class UsageLedger:
+    """
+    In-memory usage totals per day, session and model, flushed as one row
+    per turn to SQLite every USAGE_FLUSH_SECONDS (and at exit).
+
+    Today's and each session's totals are reloaded from the store on first
+    use, so budgets survive restarts. Only the max_sessions most recently
+    used session totals stay in memory; an evicted one is reloaded the same
+    way.
+    """
+
+    def __init__(self, path: str, max_sessions: int = USAGE_SESSION_CACHE):
+        self.path = path
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._pending: List[Tuple] = []
+        self._next_flush = time.time() + USAGE_FLUSH_SECONDS
+        self.by_model: Dict[str, Dict] = defaultdict(
+            lambda: {"turns": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+        )
+        self._day, self._day_tokens = "", 0
+        self._session_tokens: "OrderedDict[str, int]" = OrderedDict()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with sqlite3.connect(path) as db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS usage (
+                    ts REAL NOT NULL,
+                    day TEXT NOT NULL,
+                    session TEXT,
+                    model TEXT NOT NULL,
+                    input_tokens INTEGER NOT NULL,
+                    output_tokens INTEGER NOT NULL,
+                    cost_usd REAL NOT NULL
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS usage_day ON usage (day)")
+            db.execute("CREATE INDEX IF NOT EXISTS usage_session ON usage (session)")
+
+    def _query(self, sql: str, args: tuple) -> int:
+        with sqlite3.connect(self.path) as db:
+            return db.execute(sql, args).fetchone()[0] or 0
+
+    def day_tokens(self) -> int:
+        """Tokens used today, including rows flushed before a restart"""
+        today = time.strftime("%Y-%m-%d")
+        with self._lock:
+            if self._day != today:
+                stored = self._query(
+                    "SELECT SUM(input_tokens + output_tokens) FROM usage WHERE day = ?", (today,)
+                )
+                pending = sum(row[4] + row[5] for row in self._pending if row[1] == today)
+                self._day, self._day_tokens = today, stored + pending
+            return self._day_tokens
+
+    def session_tokens(self, session: Optional[str]) -> int:
+        if not session:
+            return 0
+        with self._lock:
+            if session not in self._session_tokens:
+                stored = self._query(
+                    "SELECT SUM(input_tokens + output_tokens) FROM usage WHERE session = ?", (session,)
+                )
+                pending = sum(row[4] + row[5] for row in self._pending if row[2] == session)
+                self._session_tokens[session] = stored + pending
+                while len(self._session_tokens) > self.max_sessions:
+                    self._session_tokens.popitem(last=False)
+            self._session_tokens.move_to_end(session)
+            return self._session_tokens[session]
+
+    def record(self, turn: TurnUsage, model_name: str) -> None:
+        self.day_tokens()
+        self.session_tokens(turn.session)
+        now = time.time()
+        with self._lock:
+            totals = self.by_model[model_name]
+            totals["turns"] += 1
+            totals["input_tokens"] += turn.input_tokens
+            totals["output_tokens"] += turn.output_tokens
+            totals["cost_usd"] += turn.cost_usd
+            self._day_tokens += turn.tokens
+            # Evicted meanwhile: the reload will count the pending row below
+            if turn.session in self._session_tokens:
+                self._session_tokens[turn.session] += turn.tokens
+            self._pending.append(
+                (now, self._day, turn.session, model_name, turn.input_tokens, turn.output_tokens, turn.cost_usd)
+            )
+        METRICS.incr("usage.tokens", turn.tokens)
+        METRICS.incr("usage.cost_usd", turn.cost_usd)
+        if now >= self._next_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self._next_flush = time.time() + USAGE_FLUSH_SECONDS
+        if rows:
+            with sqlite3.connect(self.path) as db:
+                db.executemany("INSERT INTO usage VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def check(self, turn: TurnUsage) -> Optional[str]:
+        """Scope of the first budget this turn has used up, or None"""
+        if BUDGET_MAX_TOKENS_PER_TURN and turn.tokens >= BUDGET_MAX_TOKENS_PER_TURN:
+            return "turn"
+        if BUDGET_MAX_TOKENS_PER_SESSION and (
+            self.session_tokens(turn.session) + turn.tokens >= BUDGET_MAX_TOKENS_PER_SESSION
+        ):
+            return "session"
+        if BUDGET_MAX_TOKENS_PER_DAY and self.day_tokens() + turn.tokens >= BUDGET_MAX_TOKENS_PER_DAY:
+            return "day"
+        return None
+
+    def remaining(self, turn: TurnUsage) -> Optional[Tuple[int, str]]:
+        """(tokens left, scope) under the tightest budget, or None when unlimited"""
+        limits = []
+        if BUDGET_MAX_TOKENS_PER_TURN:
+            limits.append((BUDGET_MAX_TOKENS_PER_TURN - turn.tokens, "turn"))
+        if BUDGET_MAX_TOKENS_PER_SESSION and turn.session:
+            limits.append((BUDGET_MAX_TOKENS_PER_SESSION - self.session_tokens(turn.session) - turn.tokens, "session"))
+        if BUDGET_MAX_TOKENS_PER_DAY:
+            limits.append((BUDGET_MAX_TOKENS_PER_DAY - self.day_tokens() - turn.tokens, "day"))
+        return min(limits) if limits else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "day": self._day,
+                "day_tokens": self._day_tokens,
+                "sessions_cached": len(self._session_tokens),
+                "models": {name: dict(totals) for name, totals in self.by_model.items()},
+            }
+
+    def report(self, days: int = 7, top_sessions: int = 20) -> Dict:
+        """Flushed totals per day, model and most expensive sessions"""
+        self.flush()
+        since = time.time() - days * 86400
+        with sqlite3.connect(self.path) as db:
+            def rows(sql: str) -> List[Dict]:
+                cursor = db.execute(sql, (since,))
+                names = [column[0] for column in cursor.description]
+                return [dict(zip(names, row)) for row in cursor]
+
+            totals = "COUNT(*) AS turns, SUM(input_tokens) AS input_tokens, SUM(output_tokens) AS output_tokens, SUM(cost_usd) AS cost_usd"
+            return {
+                "days": rows(f"SELECT day, {totals} FROM usage WHERE ts >= ? GROUP BY day ORDER BY day"),
+                "models": rows(f"SELECT model, {totals} FROM usage WHERE ts >= ? GROUP BY model"),
+                "sessions": rows(
+                    f"SELECT session, {totals} FROM usage WHERE ts >= ? AND session IS NOT NULL "
+                    f"GROUP BY session ORDER BY cost_usd DESC, input_tokens + output_tokens DESC LIMIT {int(top_sessions)}"
+                ),
+            }
+
+
+USAGE = UsageLedger(USAGE_DB_PATH)
+METRICS.register_gauge("usage", USAGE.stats)
+atexit.register(USAGE.flush)
+_TURN_USAGE: ContextVar[Optional[TurnUsage]] = ContextVar("turn_usage", default=None)
+# Set by answer_with_deadline once nobody waits for the turn's answer anymore
+_TURN_CANCEL: ContextVar[Optional[threading.Event]] = ContextVar("turn_cancel", default=None)
+
+
+def turn_cancelled() -> bool:
+    cancel = _TURN_CANCEL.get()
+    return cancel is not None and cancel.is_set()
+
+
+def account_model_call(input_tokens: int, output_tokens: int, cost_usd: float = 0.0) -> Optional[str]:
+    """Add one model call to the current turn; returns the exhausted budget scope, if any"""
+    turn = _TURN_USAGE.get()
+    if turn is None:
+        return None
+    turn.input_tokens += input_tokens
+    turn.output_tokens += output_tokens
+    turn.cost_usd += cost_usd
+    turn.calls += 1
+    turn.exceeded = turn.exceeded or USAGE.check(turn)
+    return turn.exceeded
+
+
+def account_agent_step(step, agent=None) -> None:
+    """CodeAgent step callback: count the step's tokens, interrupt on budget overrun or cancel"""
+    if turn_cancelled() and agent is not None:
+        agent.interrupt()
+    usage = getattr(step, "token_usage", None)
+    if usage is None:
+        return
+    if account_model_call(usage.input_tokens, usage.output_tokens) and agent is not None:
+        agent.interrupt()  # stops before the next step
+
+
+# Initialize agent based on environment
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "2"))
+PORTFOLIO_TOOLS = [
+    list_experiences,
+    list_skills,
+    list_certifications,
+    list_education,
+    analyze_profile_match,
+    search_portfolio_entries,
+    get_portfolio_entry,
+    run_portfolio_tools_in_parallel,
+]
+AGENT_INSTRUCTIONS = (
+    "When a question needs several independent lookups (e.g. experiences and "
+    "certifications), request them all in one step with "
+    "run_portfolio_tools_in_parallel instead of one tool per step."
+) + (
+    " Tool results are compact rows keyed by id: call get_portfolio_entry only "
+    "for the entries whose full description you need."
+    if TOOL_OUTPUT_MODE == "compact"
+    else ""
+)
+
+if USE_HF_MODEL:
+    model = InferenceClientModel(
+        model_id="Qwen/Qwen2.5-Coder-32B-Instruct",
+        temperature=0.7,
+        token=os.getenv("HF_TOKEN"),
+    )
+    model.generate = CASSETTE.wrap(
+        "hf", model.generate, _describe_generate, _encode_chat_message, _decode_chat_message
+    )
+
+    class WarmPythonExecutor(LocalPythonExecutor):
+        """Local executor that binds its tools once and resets its variables between runs"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._bound_tools: Optional[Tuple] = None
+            self._seeded_tools: Dict = {}
+
+        def send_tools(self, tools: Dict) -> None:
+            # agent.run sends the same tools every turn
+            key = tuple(sorted((name, id(tool)) for name, tool in tools.items()))
+            if key != self._bound_tools:
+                super().send_tools(tools)
+                self._seeded_tools = dict(self.static_tools)
+                self._bound_tools = key
+
+        def reset_state(self) -> None:
+            """
+            Drop everything the previous run created: its variables and the
+            functions it defined (custom_tools, whose closures hold that run's
+            data), and re-seed the tools send_tools bound.
+            """
+            self.state = {"__name__": "__main__"}
+            self.custom_tools = {}
+            if self.static_tools is not None:
+                self.static_tools = dict(self._seeded_tools)
+
+    class PooledCodeAgent(CodeAgent):
+        """
+        CodeAgent kept warm across chat turns.
+
+        The system prompt (a Jinja render over every tool, rebuilt by
+        smolagents on each access) is rendered once, the tools are bound to
+        a WarmPythonExecutor at construction, and each run only resets the
+        executor's variables and the functions the previous run defined. METRICS "agent.setup" times what is left
+        between run() and the first step.
+        """
+
+        def __init__(self, *args, **kwargs):
+            self._system_prompt_cache: Optional[str] = None
+            super().__init__(*args, **kwargs)
+            self.python_executor.send_tools({**self.tools, **self.managed_agents})
+
+        def create_python_executor(self):
+            if self.executor_type != "local":
+                return super().create_python_executor()
+            return WarmPythonExecutor(
+                self.additional_authorized_imports,
+                **{"max_print_outputs_length": self.max_print_outputs_length} | self.executor_kwargs,
+            )
+
+        def initialize_system_prompt(self) -> str:
+            if self._system_prompt_cache is None:
+                self._system_prompt_cache = super().initialize_system_prompt()
+            return self._system_prompt_cache
+
+        def run(self, task: str, *args, **kwargs):
+            self._run_started = time.perf_counter()
+            self.python_executor.reset_state()
+            return super().run(task, *args, **kwargs)
+
+        def _run_stream(self, *args, **kwargs):
+            METRICS.observe("agent.setup", time.perf_counter() - self._run_started)
+            yield from super()._run_stream(*args, **kwargs)
+
+    # Agents keep per-run memory, so concurrent chats each borrow their own;
+    # the model, its HTTP pool and the tools are shared by every profile
+    AGENT_POOL: "queue.Queue[CodeAgent]" = queue.Queue()
+    for _ in range(AGENT_POOL_SIZE):
+        AGENT_POOL.put(
+            PooledCodeAgent(
+                model=model,
+                tools=PORTFOLIO_TOOLS,
+                max_steps=6,
+                verbosity_level=0,
+                step_callbacks=[account_agent_step],
+                instructions=AGENT_INSTRUCTIONS,
+            )
+        )
+else:
+    completion = CASSETTE.wrap(
+        "litellm",
+        completion,
+        _describe_completion,
+        lambda response: response.model_dump(),
+        lambda data: litellm.ModelResponse(**data),
+    )
+
+
+@contextmanager
+def borrow_agent():
+    """Take an idle CodeAgent from the pool for one chat turn"""
+    agent = AGENT_POOL.get()
+    try:
+        yield agent
+    finally:
+        AGENT_POOL.put(agent)
+
+
+# Plan cache: the tool-call program the agent wrote for one question is
+# replayed, with the new slot value, for questions of the same shape
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+# Longer string literals are prose the model wrote from what it had read
+PLAN_MAX_LITERAL_WORDS = 4
+
+# (template, pattern with one named slot); anchored so only whole questions match
+PLAN_TEMPLATES = [
+    (
+        "experiences_by_technology",
+        re.compile(
+            r"^(?:.*\b(?:projects?|experiences?|missions?|work(?:ed)?)\b.*\b(?:using|with|on|in|involving)"
+            r"|.*\b(?:projets?|expériences?|missions?)\b.*\b(?:avec|utilisant|sur|en|autour d[eu]))"
+            r"\s+(?P<technology>[\w.+#/-]+(?: [\w.+#/-]+){0,3})\s*\??$",
+            re.IGNORECASE,
+        ),
+    ),
+    (
+        "profile_match",
+        re.compile(
+            r"^.*\b(?:match|analy[sz]e|fit|correspond\w*|adéquation)\b[^:]*:\s*(?P<requirements>\S.{8,})$",
+            re.IGNORECASE | re.DOTALL,
+        ),
+    ),
+]
+
+# Callables a cached program may use besides the tools
+_PLAN_SAFE_CALLS = {"len", "str", "int", "sorted", "min", "max", "enumerate", "print", "list"}
+_PLAN_SAFE_METHODS = {"join", "split", "strip", "lower", "upper", "replace", "format", "append", "splitlines"}
+
+
+class Plan(NamedTuple):
+    code: str
+    slot: str
+    value: str
+
+
+def _known_slot_value(slot: str, value: str, snapshot: PortfolioSnapshot) -> bool:
+    """A technology slot must name (part of) a technology of the portfolio"""
+    if slot != "technology":
+        return True
+    folded = f" {fold_text(value)} "
+    return folded.strip() != "" and any(
+        folded in f" {fold_text(tech)} "
+        for record in snapshot.records["experiences"]
+        for tech in record.technologies
+    )
+
+
+def match_plan_template(message: str, snapshot: PortfolioSnapshot) -> Optional[Tuple[str, str, str]]:
+    """
+    (template, slot, value) of the first template the whole question matches
+    with a slot value the snapshot knows ("projects in 2023" is no technology)
+    """
+    for name, pattern in PLAN_TEMPLATES:
+        found = pattern.match(message.strip())
+        if found:
+            slot, value = next(iter(found.groupdict().items()))
+            if _known_slot_value(slot, value.strip(), snapshot):
+                return name, slot, value.strip()
+    return None
+
+
+def validate_plan(code: str, value: str, tool_names: set) -> bool:
+    """
+    Whether a program can be replayed with another slot value.
+
+    It must be self-contained (no imports, no names it does not define),
+    pass the slot value verbatim to a tool, and hand final_answer a value
+    computed from tool results. Any string literal longer than a short label,
+    or one embedding the old slot value, is prose the model wrote from what
+    it had read, which would not hold for another value.
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return False
+
+    data_tools = tool_names - {"final_answer"}
+    stored, loaded, answers = set(), set(), []
+    slot_in_tool_call = False
+    folded_value = value.casefold()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom, ast.Global, ast.Nonlocal)):
+            return False
+        if isinstance(node, ast.Attribute) and node.attr.startswith("_"):
+            return False
+        if isinstance(node, ast.Name):
+            (stored if isinstance(node.ctx, ast.Store) else loaded).add(node.id)
+        if isinstance(node, ast.arg):
+            stored.add(node.arg)
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            text = node.value.strip().casefold()
+            if text != folded_value and (
+                folded_value in text or len(text.split()) > PLAN_MAX_LITERAL_WORDS
+            ):
+                return False
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                if node.func.id not in tool_names | _PLAN_SAFE_CALLS:
+                    return False
+                arguments = [*node.args, *(keyword.value for keyword in node.keywords)]
+                if node.func.id == "final_answer":
+                    answers.extend(arguments[:1])
+                elif node.func.id in data_tools and any(
+                    isinstance(arg, ast.Constant)
+                    and isinstance(arg.value, str)
+                    and arg.value.strip().casefold() == folded_value
+                    for arg in arguments
+                ):
+                    slot_in_tool_call = True
+            elif not (isinstance(node.func, ast.Attribute) and node.func.attr in _PLAN_SAFE_METHODS):
+                return False
+
+    # Names holding tool results, followed through assignments until stable
+    derived: set = set()
+
+    def from_tools(expr) -> bool:
+        return any(
+            (isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id in data_tools)
+            or (isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load) and n.id in derived)
+            for n in ast.walk(expr)
+        )
+
+    assignments = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Assign, ast.AugAssign, ast.AnnAssign)) and node.value is not None:
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            assignments.append((targets, node.value))
+        elif isinstance(node, (ast.For, ast.comprehension)):
+            assignments.append(([node.target], node.iter))
+    changed = True
+    while changed:
+        changed = False
+        for targets, expr in assignments:
+            if from_tools(expr):
+                for target in targets:
+                    for name in ast.walk(target):
+                        if isinstance(name, ast.Name) and name.id not in derived:
+                            derived.add(name.id)
+                            changed = True
+
+    return (
+        slot_in_tool_call
+        and bool(answers)
+        and all(from_tools(answer) for answer in answers)
+        and loaded <= stored | tool_names | _PLAN_SAFE_CALLS
+    )
+
+
+def bind_plan(plan: Plan, value: str) -> str:
+    """The cached program with every occurrence of the old slot value replaced"""
+
+    class SlotReplacer(ast.NodeTransformer):
+        def visit_Constant(self, node):
+            if isinstance(node.value, str) and node.value.strip().casefold() == plan.value.casefold():
+                return ast.copy_location(ast.Constant(value), node)
+            return node
+
+    return ast.unparse(SlotReplacer().visit(ast.parse(plan.code)))
+
+
+class PlanCache:
+    """Validated tool-call programs keyed by (profile, question template, language)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plans: Dict[Tuple[str, str, str], Plan] = {}
+
+    def run(self, message: str, agent) -> Optional[str]:
+        """The answer of the cached program for this question's shape, or None"""
+        snapshot = current_snapshot()
+        matched = match_plan_template(message, snapshot)
+        if matched is None:
+            return None
+        template, _, value = matched
+        key = (snapshot.name, template, detect_language(message))
+        with self._lock:
+            plan = self._plans.get(key)
+        if plan is None:
+            METRICS.incr("plans.misses")
+            return None
+
+        # Tools are bound at construction; the program gets fresh variables
+        agent.python_executor.reset_state()
+        started = time.perf_counter()
+        tool_outputs: List[str] = []
+        token = _TOOL_OUTPUTS.set(tool_outputs)
+        try:
+            output = agent.python_executor(bind_plan(plan, value))
+        except Exception as e:
+            output = None
+            print(f"Cached plan {template} failed, dropping it: {e}")
+        finally:
+            _TOOL_OUTPUTS.reset(token)
+        answer = output.output if output is not None and output.is_final_answer else None
+        if not isinstance(answer, str) or any(
+            text.strip() and text.strip() in answer for text in tool_outputs
+        ):
+            # Failed, or handing the visitor raw tool rows instead of prose:
+            # the agent answers this one in full
+            with self._lock:
+                self._plans.pop(key, None)
+            METRICS.incr("plans.failures")
+            return None
+        METRICS.incr("plans.hits")
+        METRICS.observe("plans.run", time.perf_counter() - started)
+        return answer
+
+    def learn(self, message: str, agent) -> None:
+        """Keep the program of a finished run if the question has a known shape"""
+        snapshot = current_snapshot()
+        matched = match_plan_template(message, snapshot)
+        if matched is None:
+            return
+        template, slot, value = matched
+        steps = [
+            step
+            for step in agent.memory.steps
+            if isinstance(step, ActionStep) and step.code_action and step.error is None
+        ]
+        if not steps or not steps[-1].is_final_answer:
+            return
+        code = "\n".join(step.code_action for step in steps)
+        if not validate_plan(code, value, set(agent.tools)):
+            METRICS.incr("plans.rejected")
+            return
+        with self._lock:
+            self._plans[(snapshot.name, template, detect_language(message))] = Plan(code, slot, value)
+        METRICS.incr("plans.learned")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return deep_sizeof(self._plans)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"plans": [":".join(key) for key in self._plans]}
+
+
+PLANS = PlanCache()
+METRICS.register_gauge("plans", PLANS.stats)
+
+
+# First-turn answer cache (filled by the startup warm-up)
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "256"))
+
+
+class AnswerCache:
+    """
+    Answers to conversation-opening questions, keyed by profile version and
+    the accent-folded question; entries expire after ttl seconds.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._answers: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+
+    @staticmethod
+    def key(snapshot: PortfolioSnapshot, question: str) -> Tuple[str, str]:
+        return snapshot.version, fold_text(question)
+
+    def get(self, key: Tuple[str, str]) -> Optional[str]:
+        with self._lock:
+            entry = self._answers.get(key)
+            if entry is None or entry[0] < time.time():
+                METRICS.incr("answers.misses")
+                return None
+            self._answers.move_to_end(key)
+            METRICS.incr("answers.hits")
+            return entry[1]
+
+    def put(self, key: Tuple[str, str], answer: str) -> None:
+        with self._lock:
+            self._answers[key] = (time.time() + self.ttl, answer)
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._answers.clear()
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return deep_sizeof(self._answers)
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        """Fresh entry present (no hit/miss counted)"""
+        with self._lock:
+            entry = self._answers.get(key)
+            return entry is not None and entry[0] >= time.time()
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+
+ANSWERS = AnswerCache(ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS)
+METRICS.register_gauge("answers", lambda: {"entries": len(ANSWERS)})
+
+
+# Extractive fallback: answers composed from the portfolio when the LLM is late or down
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "25"))  # 0 = wait forever
+FALLBACK_ENABLED = os.getenv("FALLBACK_ENABLED", "true").lower() == "true"
+
+_ENGLISH_WORDS = {
+    "the", "what", "which", "who", "is", "are", "his", "he", "does", "do", "did", "has",
+    "have", "with", "about", "tell", "me", "projects", "experience", "skills", "and", "for",
+}
+_FRENCH_WORDS = {
+    "le", "la", "les", "des", "du", "de", "est", "quels", "quelles", "quel", "sur", "avec",
+    "moi", "parle", "tu", "as", "il", "ses", "projets", "competences", "pour", "et", "a",
+}
+_MATCH_WORDS = {"match", "analyse", "analyze", "correspondance", "poste", "job", "role", "requirements"}
+# Folded word prefixes naming a category: small categories are then listed whole
+_CATEGORY_PREFIXES = {
+    "experiences": ("projet", "project", "experience", "mission"),
+    "skills": ("competence", "skill", "technolog", "maitris", "stack"),
+    "certifications": ("certif",),
+    "education": ("etud", "study", "studied", "formation", "diplom", "degree", "school", "ecole", "education"),
+}
+
+FALLBACK_TEXT = {
+    "fr": {
+        "intro": "Voici ce que le portfolio de {name} indique à ce sujet :",
+        "overview": "{name} présente {experiences} expériences, {skills} domaines de compétences et {certifications} certifications. Expériences récentes :",
+        "match": "Correspondance avec « {requirements} » : niveau **{level}**.",
+        "experiences": "Expériences",
+        "skills": "Compétences",
+        "certifications": "Certifications",
+        "education": "Formation",
+        "at": "chez",
+        "sep": " :",
+        "note": "_Réponse composée directement à partir du portfolio : l'assistant IA est momentanément indisponible._",
+    },
+    "en": {
+        "intro": "Here is what {name}'s portfolio says about this:",
+        "overview": "{name} has {experiences} experiences, {skills} skill areas and {certifications} certifications. Recent experiences:",
+        "match": "Match with \"{requirements}\": **{level}** level.",
+        "experiences": "Experiences",
+        "skills": "Skills",
+        "certifications": "Certifications",
+        "education": "Education",
+        "at": "at",
+        "sep": ":",
+        "note": "_Answer composed directly from the portfolio: the AI assistant is temporarily unavailable._",
+    },
+}
+
+
+def detect_language(text: str) -> str:
+    """'en' or 'fr' (the portfolio's language, also the default)"""
+    words = fold_text(text).split()
+    english = sum(word in _ENGLISH_WORDS for word in words)
+    french = sum(word in _FRENCH_WORDS for word in words)
+    return "en" if english > french else "fr"
+
+
+def _fallback_line(category: str, record, text: Dict) -> str:
+    if category == "experiences":
+        line = f"- **{record.title}** {text['at']} {record.client}"
+        if record.duration:
+            line += f" ({record.duration})"
+        description = record.description if len(record.description) <= 200 else record.description[:199] + "…"
+        return f"{line}{text['sep']} {description}\n  {', '.join(record.technologies)}"
+    if category == "skills":
+        return f"- **{record.category}**{text['sep']} {', '.join(record.skills)}"
+    if category == "certifications":
+        return f"- **{record.name}** - {record.issuer} ({record.year})"
+    return f"- **{record.degree}** - {record.school} ({record.year})"
+
+
+def extractive_answer(message: str, snapshot: PortfolioSnapshot) -> str:
+    """
+    Templated French/English answer built from the portfolio alone: a match
+    analysis for job-description questions, otherwise the entries closest
+    to the question (or an overview when nothing is close).
+    """
+    text = FALLBACK_TEXT[detect_language(message)]
+    records = snapshot.records
+    name = snapshot.profile["name"]
+    selected: Dict[str, List[int]] = defaultdict(list)
+    lines = []
+
+    words = fold_text(message).split()
+    if _MATCH_WORDS & set(words):
+        # "Analyse le match pour : <requirements>"
+        requirements = message.split(":", 1)[-1].strip() or message
+        matches = snapshot.match_index.score(requirements)
+        lines.append(text["match"].format(requirements=requirements, level=match_level(matches["strength"])[0]))
+        titles = {exp["title"] for exp in matches["experiences"]}
+        selected["experiences"] = [i for i, exp in enumerate(records["experiences"]) if exp.title in titles]
+        selected["skills"] = [
+            i for i, skill_set in enumerate(records["skills"]) if set(skill_set.skills) & set(matches["skills"])
+        ]
+    else:
+        asked = {
+            category
+            for category, prefixes in _CATEGORY_PREFIXES.items()
+            if any(word.startswith(prefixes) for word in words)
+        }
+        for category in asked - {"experiences"}:
+            selected[category] = list(range(len(records[category])))
+        # Closest entries, within the experiences when those were asked for
+        hits = snapshot.embedding_index.search(message, len(snapshot.embedding_index.entries))
+        hits = [hit for hit in hits if hit[1] not in selected]
+        if "experiences" in asked:
+            hits = [hit for hit in hits if hit[1] == "experiences"]
+        if hits:
+            floor = max(0.2, 0.75 * hits[0][0])
+            for score, category, index, _ in hits[:RETRIEVAL_TOP_K]:
+                if score >= floor:
+                    selected[category].append(index)
+        if any(selected.values()):
+            lines.append(text["intro"].format(name=name))
+
+    if not any(selected.values()):
+        lines = [
+            text["overview"].format(
+                name=name,
+                experiences=len(records["experiences"]),
+                skills=len(records["skills"]),
+                certifications=len(records["certifications"]),
+            )
+        ]
+        # Most recent first: the date index orders oldest -> newest
+        if records["experiences"]:
+            order = snapshot.date_index["experiences"].order
+            selected["experiences"] = list(reversed(order))[:3]
+
+    for category in CATEGORIES:
+        if selected.get(category):
+            lines.append(f"\n**{text[category]}**")
+            lines += [_fallback_line(category, records[category][i], text) for i in selected[category]]
+    lines.append(f"\n{text['note']}")
+    return "\n".join(lines)
+
+
+# Runs LLM calls so answer_with_deadline can stop waiting for them
+_LLM_POOL = ThreadPoolExecutor(max(4, AGENT_POOL_SIZE * 4), thread_name_prefix="llm")
+
+
+def answer_with_deadline(
+    message: str,
+    history: List,
+    snapshot: PortfolioSnapshot,
+    session: Optional[str] = None,
+    on_late_answer: Optional[Callable[[str], None]] = None,
+) -> Tuple[str, bool]:
+    """
+    (answer, from_llm): the LLM answer if it arrives within
+    LLM_DEADLINE_SECONDS, otherwise (or if it fails) the extractive one.
+
+    On timeout the run is cancelled: dropped if still queued, interrupted
+    at its next agent step otherwise, so it stops holding a pooled agent
+    and spending tokens. A late answer that still completes (a single
+    LiteLLM call cannot be interrupted) is handed to on_late_answer (e.g.
+    to fill the cache).
+    """
+    if not FALLBACK_ENABLED:
+        return generate_answer(message, history, snapshot, session), True
+
+    from concurrent.futures import TimeoutError
+    from contextvars import copy_context
+
+    cancel = threading.Event()
+    context = copy_context()
+    context.run(_TURN_CANCEL.set, cancel)
+    future = _LLM_POOL.submit(context.run, generate_answer, message, history, snapshot, session)
+    try:
+        return future.result(timeout=LLM_DEADLINE_SECONDS or None), True
+    except TimeoutError:
+        METRICS.incr("chat.fallback.deadline")
+        cancel.set()
+        if future.cancel():
+            METRICS.incr("chat.fallback.cancelled")
+        elif on_late_answer:
+            future.add_done_callback(
+                lambda done: done.exception() is None and on_late_answer(done.result())
+            )
+    except BudgetExceeded:
+        raise
+    except Exception as e:
+        METRICS.incr("chat.fallback.error")
+        print(f"LLM failed, answering from the portfolio: {e}")
+    return extractive_answer(message, snapshot), False
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller computes,
+    the others wait for its result instead of starting their own.
+
+    Only successes are shared; if the leader fails, each waiter computes on
+    its own (the failure may be specific to the leader, e.g. its budget).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple, Dict] = {}
+
+    def do(self, key: Tuple, compute: Callable[[], str]) -> str:
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = {"done": threading.Event(), "result": None}
+        if not leader:
+            METRICS.incr("chat.coalesced")
+            call["done"].wait()
+            if call["result"] is not None:
+                return call["result"]
+            return compute()
+
+        try:
+            call["result"] = compute()
+            return call["result"]
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call["done"].set()
+
+
+CHAT_FLIGHTS = SingleFlight()
+
+
+def build_prompt_messages(message: str, history: List, snapshot: PortfolioSnapshot) -> List[Dict]:
+    """LiteLLM messages: grounded system prompt, past turns, then the question"""
+    profile = snapshot.profile
+    records = snapshot.records
+    summary = "\n".join(f"- {line}" for line in profile["summary"])
+    context = f"""You are an AI assistant representing {profile['name']}'s portfolio ({profile['title']}).
+
+Key Information:
+{summary}
+- Certifications: {', '.join([cert.name for cert in records['certifications']])}
+
+Portfolio Summary:
+- {len(records['experiences'])} professional experiences
+- {len(records['skills'])} skill categories
+- {len(records['certifications'])} certifications
+
+Most relevant portfolio entries for this question:
+{build_chat_context(message, snapshot)}
+
+Answer questions professionally and highlight relevant experiences.
+Do not invent details that are not in this context."""
+
+    messages = [{"role": "system", "content": context}]
+
+    for user_msg, assistant_msg in history:
+        messages.append({"role": "user", "content": user_msg})
+        messages.append({"role": "assistant", "content": assistant_msg})
+
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
+class PreparedTurn(NamedTuple):
+    """Work done while the visitor was typing (see SpeculativePreparer)"""
+
+    message: str
+    snapshot: PortfolioSnapshot
+    history: Tuple
+    route: str  # "cached" or "llm"
+    messages: Optional[List[Dict]] = None
+    prompt_tokens: Optional[int] = None
+
+    def fits(self, message: str, history: List, snapshot: PortfolioSnapshot) -> bool:
+        return (
+            self.message == message
+            and self.snapshot is snapshot
+            and self.history == tuple(tuple(turn) for turn in history)
+        )
+
+
+def agent_task(message: str, snapshot: PortfolioSnapshot) -> str:
+    """CodeAgent task: the question, with whose portfolio the tools describe"""
+    profile = snapshot.profile
+    return (
+        f"You are an AI assistant representing {profile['name']}'s portfolio ({profile['title']}). "
+        f"The tools return {profile['name']}'s experiences, skills, certifications and education.\n\n"
+        f"Question: {message}"
+    )
+
+
+# Set by chat_session_turn when the submitted message was prepared
+_PREPARED_TURN: ContextVar[Optional[PreparedTurn]] = ContextVar("prepared_turn", default=None)
+
+
+@follows_sampler
+def generate_answer(
+    message: str, history: List, snapshot: PortfolioSnapshot, session: Optional[str] = None
+) -> str:
+    """One LLM answer (SmolAgent or LiteLLM), with usage accounting and budgets"""
+    turn = TurnUsage(session)
+    turn_token = _TURN_USAGE.set(turn)
+    model_name = model.model_id if USE_HF_MODEL else os.getenv("LITELLM_MODEL", "gpt-4o-mini")
+    try:
+        exhausted = USAGE.check(turn)
+        if exhausted:
+            raise BudgetExceeded(exhausted)
+
+        if USE_HF_MODEL:
+            # Use SmolAgent; account_agent_step interrupts it on budget overrun.
+            # A question shaped like one already answered replays its program
+            with borrow_agent() as agent:
+                if turn_cancelled():
+                    raise TurnCancelled("deadline passed while waiting for an agent")
+                if PLAN_CACHE_ENABLED:
+                    planned = PLANS.run(message, agent)
+                    if planned is not None:
+                        return planned
+                result = agent.run(agent_task(message, snapshot))
+                if PLAN_CACHE_ENABLED:
+                    PLANS.learn(message, agent)
+            return (
+                result.get("output", str(result))
+                if isinstance(result, dict)
+                else str(result)
+            )
+
+        # Use LiteLLM, with the prompt assembled while the visitor typed if possible
+        prepared = _PREPARED_TURN.get()
+        if prepared is not None and prepared.messages and prepared.fits(message, history, snapshot):
+            messages, prompt_tokens = prepared.messages, prepared.prompt_tokens
+        else:
+            messages, prompt_tokens = build_prompt_messages(message, history, snapshot), None
+
+        # Cap the completion to what the tightest budget still allows
+        max_tokens = 500
+        budget = USAGE.remaining(turn)
+        if budget is not None:
+            left, scope = budget
+            if prompt_tokens is None:
+                prompt_tokens = litellm.token_counter(model=model_name, messages=messages)
+            left -= prompt_tokens
+            if left <= 0:
+                raise BudgetExceeded(scope)
+            max_tokens = min(max_tokens, left)
+
+        llm_response = completion(
+            model=model_name,
+            messages=messages,
+            api_key=os.getenv("OPENAI_API_KEY"),
+            temperature=0.7,
+            max_tokens=max_tokens,
+        )
+
+        try:
+            cost = litellm.completion_cost(completion_response=llm_response)
+        except Exception:
+            cost = 0.0  # model missing from LiteLLM's price list
+        usage = llm_response.usage
+        account_model_call(usage.prompt_tokens, usage.completion_tokens, cost)
+
+        return llm_response.choices[0].message.content
+
+    except BudgetExceeded:
+        raise
+    except Exception as e:
+        if turn.exceeded:
+            raise BudgetExceeded(turn.exceeded) from e
+        raise
+
+    finally:
+        _TURN_USAGE.reset(turn_token)
+        if turn.calls:
+            USAGE.record(turn, model_name)
+
+
+def select_snapshot(message: str, request) -> PortfolioSnapshot:
+    """
+    Bind the request's profile, in the question's language when it has been
+    built, so the answer is grounded in entries the model can quote instead
+    of translating them.
+    """
+    snapshot = activate_profile(request)
+    language = detect_language(message)
+    if language != snapshot.language and language in available_languages():
+        snapshot = SNAPSHOTS.get(snapshot.name, language)
+        _ACTIVE_SNAPSHOT.set(snapshot)
+    return snapshot
+
+
+@profiled("chat_with_agent")
+def chat_with_agent(
+    message: str, history: List, request: gr.Request = None, session: Optional[str] = None
+) -> Tuple[str, List]:
+    """
+    Process chat message using SmolAgent or LiteLLM
+
+    Args:
+        message: User's message
+        history: Chat history
+        request: Gradio request, used to select the profile
+        session: Session store key, for per-session usage and budgets
+
+    Returns:
+        Tuple of (empty string for input, updated history)
+    """
+    prepared = _PREPARED_TURN.get()
+    if prepared is not None and prepared.message == message:
+        snapshot = prepared.snapshot
+        _ACTIVE_SNAPSHOT.set(snapshot)
+    else:
+        snapshot = select_snapshot(message, request)
+    try:
+        if history:
+            response, _ = answer_with_deadline(message, history, snapshot, session)
+        else:
+            # Opening questions are cached, and identical ones in flight
+            # (same folded text and portfolio version) share one LLM call
+            cache_key = AnswerCache.key(snapshot, message)
+            response = ANSWERS.get(cache_key)
+            if response is None:
+
+                def compute() -> str:
+                    def cache(answer: str) -> None:
+                        ANSWERS.put(cache_key, answer)
+
+                    # Fallback answers are not cached; a late LLM answer is
+                    answer, from_llm = answer_with_deadline(
+                        message, history, snapshot, session, on_late_answer=cache
+                    )
+                    if from_llm:
+                        cache(answer)
+                    return answer
+
+                response = CHAT_FLIGHTS.do(cache_key, compute)
+
+        history.append((message, response))
+        return "", history
+
+    except Exception as e:
+        if isinstance(e, BudgetExceeded):
+            METRICS.incr(f"usage.cut_off.{e.scope}")
+            error_msg = f"I had to stop here: the token budget per {e.scope} is used up. Please try again later."
+        else:
+            error_msg = f"I encountered an error: {str(e)}. Please try again."
+        history.append((message, error_msg))
+        return "", history
+
+
+# Server-side conversation store: the browser only keeps a session id
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", ".cache/sessions.sqlite3")
+SESSION_MAX_TURNS = int(os.getenv("SESSION_MAX_TURNS", "50"))
+SESSION_IDLE_HOURS = float(os.getenv("SESSION_IDLE_HOURS", "72"))
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+class SessionStore:
+    """
+    Chat histories in SQLite (WAL mode), keyed by profile and session id.
+
+    Each session keeps its last max_turns turns; sessions idle for longer
+    than idle_seconds are deleted, at most once a minute, on write.
+    """
+
+    def __init__(self, path: str, max_turns: int, idle_seconds: float):
+        self.path = path
+        self.max_turns = max_turns
+        self.idle_seconds = idle_seconds
+        self._local = threading.local()
+        self._next_eviction = 0.0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connection() as db:
+            db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    key TEXT PRIMARY KEY,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS turns (
+                    key TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    user TEXT NOT NULL,
+                    assistant TEXT NOT NULL,
+                    PRIMARY KEY (key, seq)
+                );
+                CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at);
+                """
+            )
+
+    def _connection(self):
+        """One connection per thread (sqlite3 objects are not shareable)"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def history(self, key: str) -> List[Tuple[str, str]]:
+        rows = self._connection().execute(
+            "SELECT user, assistant FROM turns WHERE key = ? ORDER BY seq", (key,)
+        )
+        return [tuple(row) for row in rows]
+
+    def append(self, key: str, user: str, assistant: str) -> None:
+        now = time.time()
+        with self._connection() as db:
+            # One statement, so two tabs of the same session cannot pick the same seq
+            db.execute(
+                "INSERT INTO turns SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ? FROM turns WHERE key = ?",
+                (key, user, assistant, key),
+            )
+            db.execute(
+                "DELETE FROM turns WHERE key = ? AND seq <= (SELECT MAX(seq) FROM turns WHERE key = ?) - ?",
+                (key, key, self.max_turns),
+            )
+            db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?)", (key, now))
+            if now >= self._next_eviction:
+                self._next_eviction = now + 60
+                self._evict_idle(db, now - self.idle_seconds)
+
+    def _evict_idle(self, db, cutoff: float) -> None:
+        stale = [key for (key,) in db.execute("SELECT key FROM sessions WHERE updated_at < ?", (cutoff,))]
+        db.executemany("DELETE FROM turns WHERE key = ?", [(key,) for key in stale])
+        db.executemany("DELETE FROM sessions WHERE key = ?", [(key,) for key in stale])
+        if stale:
+            METRICS.incr("sessions.evicted", len(stale))
+
+    def stats(self) -> Dict:
+        count = self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {"sessions": count, "bytes": os.path.getsize(self.path)}
+
+
+SESSIONS = SessionStore(SESSION_DB_PATH, SESSION_MAX_TURNS, SESSION_IDLE_HOURS * 3600)
+METRICS.register_gauge("sessions", SESSIONS.stats)
+
+
+def _file_bytes(path: str) -> int:
+    """A SQLite database with its WAL"""
+    return sum(
+        os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p)
+    )
+
+
+def _idle_agents() -> List:
+    with AGENT_POOL.mutex:
+        return list(AGENT_POOL.queue)
+
+
+def _reset_idle_agents() -> None:
+    """Forget the last run's steps and variables of idle agents (reset on next run anyway)"""
+    for _ in range(AGENT_POOL_SIZE):
+        try:
+            agent = AGENT_POOL.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            agent.memory.reset()
+            agent.python_executor.reset_state()
+        finally:
+            AGENT_POOL.put(agent)
+
+
+# Eviction order: the cheapest to rebuild first
+if USE_HF_MODEL:
+    MEMORY.register_component(
+        "agent_memory",
+        lambda: sum(deep_sizeof(agent.memory) for agent in _idle_agents()),
+        _reset_idle_agents,
+    )
+MEMORY.register_component("profiles", SNAPSHOTS.size_bytes, SNAPSHOTS.trim)
+MEMORY.register_component("plans", PLANS.size_bytes, PLANS.clear)
+MEMORY.register_component("answers", ANSWERS.size_bytes, ANSWERS.clear)
+MEMORY.register_component("sessions", lambda: _file_bytes(SESSION_DB_PATH), resident=False)
+MEMORY.register_component("usage", lambda: _file_bytes(USAGE_DB_PATH), resident=False)
+
+
+def session_key(session_id: str, snapshot: PortfolioSnapshot) -> Optional[str]:
+    """Store key of a client session id; None if the id is malformed"""
+    if not session_id or not _SESSION_ID.match(session_id):
+        return None
+    return f"{snapshot.name}/{session_id}"
+
+
+def chat_session_turn(
+    message: str, session_id: str, request: gr.Request = None
+) -> Tuple[str, List[str]]:
+    """
+    Answer one message of a stored conversation.
+
+    The history is read from SESSIONS instead of being sent by the client,
+    and only the new [message, response] turn is returned.
+    """
+    key = session_key(session_id, activate_profile(request))
+    history = SESSIONS.history(key) if key else []
+    prepared = SPECULATION.take(key, message) if key else None
+    token = _PREPARED_TURN.set(prepared)
+    try:
+        _, history = chat_with_agent(message, history, request, session=key)
+    finally:
+        _PREPARED_TURN.reset(token)
+    turn = history[-1]
+    if key:
+        try:
+            SESSIONS.append(key, *turn)
+        except sqlite3.Error as e:
+            # The answer is already paid for: show it even if it is not remembered
+            METRICS.incr("sessions.write_errors")
+            print(f"Session write failed: {e}")
+    return "", list(turn)
+
+
+# Speculative preparation: while the visitor types, the draft's snapshot,
+# retrieval and prompt are computed, then reused if it is sent as is.
+# LiteLLM only: the CodeAgent builds its prompt itself, nothing to prepare
+SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "true").lower() == "true" and not USE_HF_MODEL
+SPECULATION_MIN_CHARS = int(os.getenv("SPECULATION_MIN_CHARS", "8"))
+SPECULATION_CONCURRENCY = int(os.getenv("SPECULATION_CONCURRENCY", "8"))
+
+
+def prepare_turn(message: str, key: str, request) -> PreparedTurn:
+    """Everything before the LLM call that depends only on the message and the session"""
+    snapshot = select_snapshot(message, request)
+    history = SESSIONS.history(key)
+    frozen = tuple(tuple(turn) for turn in history)
+    if not history and AnswerCache.key(snapshot, message) in ANSWERS:
+        # Answered from the cache: no prompt to build
+        return PreparedTurn(message, snapshot, frozen, "cached")
+
+    messages = build_prompt_messages(message, history, snapshot)
+    model_name = os.getenv("LITELLM_MODEL", "gpt-4o-mini")
+    prompt_tokens = litellm.token_counter(model=model_name, messages=messages)
+    return PreparedTurn(message, snapshot, frozen, "llm", messages, prompt_tokens)
+
+
+class SpeculativePreparer:
+    """
+    Latest prepared draft per session.
+
+    Gradio's always_last trigger mode already skips the drafts typed while
+    one is computing; a result overtaken by a newer draft (or the submit)
+    while computing is dropped. take() hands the prepared turn to the
+    submit only when the sent message is exactly the prepared draft. Both
+    maps keep the max_sessions most recently active sessions.
+    """
+
+    def __init__(self, max_sessions: int = 1024):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._latest: "OrderedDict[str, int]" = OrderedDict()
+        self._prepared: "OrderedDict[str, PreparedTurn]" = OrderedDict()
+
+    def _next(self, key: str) -> int:
+        with self._lock:
+            self._seq += 1
+            self._latest[key] = self._seq
+            self._latest.move_to_end(key)
+            # Drafts of sessions that never submitted
+            while len(self._latest) > self.max_sessions:
+                self._latest.popitem(last=False)
+            self._prepared.pop(key, None)
+            return self._seq
+
+    def propose(self, key: str, draft: str, prepare: Callable[[], PreparedTurn]) -> None:
+        seq = self._next(key)
+        started = time.perf_counter()
+        prepared = prepare()
+        METRICS.observe("speculation.prepare", time.perf_counter() - started)
+        with self._lock:
+            if self._latest.get(key) != seq:
+                METRICS.incr("speculation.stale")
+                return
+            self._prepared[key] = prepared
+            self._prepared.move_to_end(key)
+            while len(self._prepared) > self.max_sessions:
+                self._prepared.popitem(last=False)
+        METRICS.incr(f"speculation.route.{prepared.route}")
+
+    def take(self, key: str, message: str) -> Optional[PreparedTurn]:
+        """The prepared turn for this exact message; any draft still in progress is cancelled"""
+        with self._lock:
+            prepared = self._prepared.pop(key, None)
+            self._latest.pop(key, None)
+        if prepared is not None and prepared.message == message:
+            METRICS.incr("speculation.hits")
+            return prepared
+        METRICS.incr("speculation.misses")
+        return None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"prepared": len(self._prepared), "pending": len(self._latest)}
+
+
+SPECULATION = SpeculativePreparer()
+METRICS.register_gauge("speculation", SPECULATION.stats)
+
+
+def prepare_draft(draft: str, session_id: str, request: gr.Request = None) -> None:
+    """msg.input handler: prepare the draft being typed (no output)"""
+    if len(draft.strip()) < SPECULATION_MIN_CHARS:
+        return
+    key = session_key(session_id, activate_profile(request))
+    if not key:
+        return
+    try:
+        SPECULATION.propose(key, draft, lambda: prepare_turn(draft, key, request))
+    except Exception as e:
+        print(f"Speculative preparation failed: {e}")
+
+
+def restore_session(session_id: str, request: gr.Request = None) -> List[Tuple[str, str]]:
+    """Stored turns of a session, shown again after a reload or a restart"""
+    key = session_key(session_id, activate_profile(request))
+    return SESSIONS.history(key) if key else []
+
+
+# Generate HTML for carousel card
+def generate_card_html(record, category: str) -> str:
+    """Generate HTML for a portfolio record card from its precomputed display fields"""
+
+    card = record.card
+    tech_badges = "".join(
+        [f'<span class="tech-badge">{tech}</span>' for tech in card.badges]
+    )
+
+    return f"""
+    <div class="card">
+        <div class="card-header">
+            <div class="card-logo">{card.icon}</div>
+            <div style="flex: 1;">
+                <div class="card-title">{card.title}</div>
+                {f'<div class="card-subtitle">{card.subtitle}</div>' if card.subtitle else ''}
+            </div>
+        </div>
+        <div class="card-content">{card.description}</div>
+        {f'<div class="card-meta">📅 {card.duration}</div>' if card.duration else ''}
+        {f'<div class="card-meta">🎯 {card.impact}</div>' if card.impact else ''}
+        <div style="margin-top: auto;">{tech_badges}</div>
+    </div>
+    """
+
+
+# Generate timeline HTML with click handlers
+TIMELINE_WINDOW = int(os.getenv("TIMELINE_WINDOW", "9"))  # 0 renders every dot
+TIMELINE_MAX_BUCKETS = int(os.getenv("TIMELINE_MAX_BUCKETS", "8"))
+
+
+def _timeline_dot_html(original_index: int, label: str, active: bool) -> str:
+    return f"""
+        <div class="timeline-item {'active' if active else ''}" data-index="{original_index}" onclick="window.jumpToCard({original_index})">
             <div class="timeline-dot"></div>
-            <div class="timeline-label">{date}</div>
+            <div class="timeline-label">{label}</div>
         </div>
         """
+
+
+def _timeline_buckets_html(index: CategoryDateIndex, position: int) -> str:
+    """Year (or month, within a single year) markers that jump to their first item"""
+    years = {ordinal // 10000 for ordinal in index.ordinals if ordinal is not None}
+    by_month = len(years) <= 1
+    buckets: List[List] = []  # [key, first original index, count, first position]
+    for pos, original_index in enumerate(index.order):
+        ordinal = index.ordinals[original_index]
+        if ordinal is None:
+            key = "—"
+        elif by_month:
+            key = f"{ordinal // 10000}-{ordinal // 100 % 100:02d}"
+        else:
+            key = str(ordinal // 10000)
+        if buckets and buckets[-1][0] == key:
+            buckets[-1][2] += 1
+        else:
+            buckets.append([key, original_index, 1, pos])
+
+    active_bucket = max(b for b, bucket in enumerate(buckets) if bucket[3] <= position)
+    half = TIMELINE_MAX_BUCKETS // 2
+    first = max(0, min(active_bucket - half, len(buckets) - TIMELINE_MAX_BUCKETS))
+    shown = buckets[first : first + TIMELINE_MAX_BUCKETS]
+
+    markers = []
+    if first > 0:
+        markers.append(
+            f'<span class="timeline-bucket" onclick="window.jumpToCard({buckets[0][1]})">«</span>'
         )
+    for b, (key, original_index, count, _) in enumerate(shown, start=first):
+        active_class = "active" if b == active_bucket else ""
+        markers.append(
+            f'<span class="timeline-bucket {active_class}" onclick="window.jumpToCard({original_index})">'
+            f"{key} · {count}</span>"
+        )
+    if first + len(shown) < len(buckets):
+        markers.append(
+            f'<span class="timeline-bucket" onclick="window.jumpToCard({buckets[-1][1]})">»</span>'
+        )
+    return f'<div class="timeline-buckets">{"".join(markers)}</div>'
+
 
-    return f'<div class="timeline">{"".join(timeline_items)}</div>'
+def category_date_index(category: str, items: List) -> CategoryDateIndex:
+    """Prebuilt index of the active profile's category, or a fresh one for ad-hoc dict lists"""
+    index = current_snapshot().date_index.get(category)
+    if index is None or len(index.order) != len(items):
+        index = index_category_dates(items)
+    return index
+
+
+def generate_timeline_html(
+    items: List[Dict], active_index: int, category: str, window: Optional[int] = None
+) -> str:
+    """
+    Generate HTML for interactive timeline with chronological order.
+
+    Categories longer than `window` (default TIMELINE_WINDOW) are windowed:
+    only the dots around the active item are sent, with "+N" markers for the
+    hidden ones and year/month bucket markers to jump across the range, so
+    the payload stays constant however many items the category holds.
+    """
+    window = TIMELINE_WINDOW if window is None else window
+    index = category_date_index(category, items)
+    order, labels = index.order, index.labels
+
+    if window <= 0 or len(order) <= window:
+        timeline_items = [
+            _timeline_dot_html(i, labels[i], i == active_index) for i in order
+        ]
+        return f'<div class="timeline">{"".join(timeline_items)}</div>'
+
+    position = index.rank[active_index] if 0 <= active_index < len(order) else 0
+    start = max(0, min(position - window // 2, len(order) - window))
+    end = start + window
+
+    timeline_items = []
+    if start > 0:
+        timeline_items.append(
+            f'<div class="timeline-more" onclick="window.jumpToCard({order[start - 1]})">+{start}</div>'
+        )
+    timeline_items += [
+        _timeline_dot_html(i, labels[i], i == active_index) for i in order[start:end]
+    ]
+    if end < len(order):
+        timeline_items.append(
+            f'<div class="timeline-more" onclick="window.jumpToCard({order[end]})">+{len(order) - end}</div>'
+        )
+
+    return (
+        _timeline_buckets_html(index, position)
+        + f'<div class="timeline">{"".join(timeline_items)}</div>'
+    )
+
+
+# Static page sections (shared by the Gradio UI and export_static.py)
+CATEGORY_LABELS = {
+    "experiences": "🚀 Expériences",
+    "skills": "💡 Expertise & Skills",
+    "certifications": "🏆 Certifications",
+    "education": "🎓 Études",
+}
+
+
+EXAMPLE_QUESTIONS = [
+    "Quels sont les projets avec des agents IA ?",
+    "Parle-moi de l'expérience avec MCP",
+    "Quelles technologies GenAI maîtrise Clément ?",
+    "Analyse le match pour : Senior GenAI Engineer avec Azure",
+]
+
+
+def generate_header_html() -> str:
+    """Generate HTML for the header with social links"""
+    profile = current_snapshot().profile
+    return f"""
+    <div class="premium-header">
+        <h1>{profile['name']}</h1>
+        <p>{profile['title']}</p>
+        <p style="margin-top: 0.5rem; opacity: 0.9;">
+            {profile['headline']}
+        </p>
+        <p style="margin-top: 1rem; font-size: 1rem; opacity: 0.85;">
+            {profile['pitch']}
+        </p>
+        <div class="social-links">
+            <a href="{profile['linkedin']}" target="_blank" class="social-link">
+                <svg width="20" height="20" fill="currentColor" viewBox="0 0 24 24">
+                    <path d="M19 0h-14c-2.761 0-5 2.239-5 5v14c0 2.761 2.239 5 5 5h14c2.762 0 5-2.239 5-5v-14c0-2.761-2.238-5-5-5zm-11 19h-3v-11h3v11zm-1.5-12.268c-.966 0-1.75-.79-1.75-1.764s.784-1.764 1.75-1.764 1.75.79 1.75 1.764-.783 1.764-1.75 1.764zm13.5 12.268h-3v-5.604c0-3.368-4-3.113-4 0v5.604h-3v-11h3v1.765c1.396-2.586 7-2.777 7 2.476v6.759z"/>
+                </svg>
+                LinkedIn
+            </a>
+            <a href="{profile['github']}" target="_blank" class="social-link">
+                <svg width="20" height="20" fill="currentColor" viewBox="0 0 24 24">
+                    <path d="M12 0c-6.626 0-12 5.373-12 12 0 5.302 3.438 9.8 8.207 11.387.599.111.793-.261.793-.577v-2.234c-3.338.726-4.033-1.416-4.033-1.416-.546-1.387-1.333-1.756-1.333-1.756-1.089-.745.083-.729.083-.729 1.205.084 1.839 1.237 1.839 1.237 1.07 1.834 2.807 1.304 3.492.997.107-.775.418-1.305.762-1.604-2.665-.305-5.467-1.334-5.467-5.931 0-1.311.469-2.381 1.236-3.221-.124-.303-.535-1.524.117-3.176 0 0 1.008-.322 3.301 1.23.957-.266 1.983-.399 3.003-.404 1.02.005 2.047.138 3.006.404 2.291-1.552 3.297-1.23 3.297-1.23.653 1.653.242 2.874.118 3.176.77.84 1.235 1.911 1.235 3.221 0 4.609-2.807 5.624-5.479 5.921.43.372.823 1.102.823 2.222v3.293c0 .319.192.694.801.576 4.765-1.589 8.199-6.086 8.199-11.386 0-6.627-5.373-12-12-12z"/>
+                </svg>
+                GitHub
+            </a>
+        </div>
+    </div>
+    """
+
+
+def generate_stats_html() -> str:
+    """Generate HTML for the statistics cards"""
+    snapshot = current_snapshot()
+    stats = [
+        {"icon": "🚀", "value": len(snapshot.records["experiences"]), "label": "Projets GenAI majeurs"},
+        {"icon": "🏆", "value": len(snapshot.records["certifications"]), "label": "Certifications AI"},
+        *snapshot.profile["highlights"],
+    ]
+    cards = "".join(
+        f"""
+        <div class="stat-card">
+            <div style="font-size: 2rem; margin-bottom: 0.5rem;">{stat['icon']}</div>
+            <div class="stat-value">{stat['value']}</div>
+            <div class="stat-label">{stat['label']}</div>
+        </div>"""
+        for stat in stats
+    )
+    return f"""
+    <div class="stats-container">{cards}
+    </div>
+    """
+
+
+def generate_footer_html(built_with: str = "Gradio") -> str:
+    """Generate HTML for the footer"""
+    profile = current_snapshot().profile
+    model_info = (
+        "Qwen2.5-Coder-32B (HuggingFace)"
+        if USE_HF_MODEL
+        else f"{os.getenv('LITELLM_MODEL', 'GPT-4o-mini')} (LiteLLM)"
+    )
+    return f"""
+    <div class="footer">
+        <p style="color: {COLORS['text_primary']}; font-size: 1rem; font-weight: 500; margin-bottom: 0.5rem;">
+            © 2025 {profile['name']} - {profile['title']}
+        </p>
+        <p style="color: {COLORS['text_secondary']}; font-size: 0.875rem;">
+            Built with {built_with} & {model_info}
+        </p>
+    </div>
+    """
+
+
+# Browser side of the session store: a persistent id, and turn appends
+SESSION_ID_JS = """
+() => {
+    let id = localStorage.getItem("portfolio-session-id");
+    if (!id) {
+        // randomUUID needs a secure context (https or localhost)
+        id = crypto.randomUUID
+            ? crypto.randomUUID().replace(/-/g, "")
+            : Array.from(crypto.getRandomValues(new Uint8Array(16)), (b) => b.toString(16).padStart(2, "0")).join("");
+        localStorage.setItem("portfolio-session-id", id);
+    }
+    return id;
+}
+"""
+APPEND_TURN_JS = "(history, turn) => [...(history || []), turn]"
 
 
 # Create Gradio interface
@@ -940,70 +4473,25 @@ def create_interface():
         index_state = gr.State(0)
 
         # Header with social links
-        gr.HTML(
-            f"""
-        <div class="premium-header">
-            <h1>Clément Peponnet</h1>
-            <p>Portfolio GenAI & Agentic</p>
-            <p style="margin-top: 0.5rem; opacity: 0.9;">
-                Expert GenAI | Tech Lead Agents & MCP | Azure AI Engineer
-            </p>
-            <p style="margin-top: 1rem; font-size: 1rem; opacity: 0.85;">
-                Convaincu par le potentiel de la GenAI et de l'Agentic AI,<br>
-                j'accompagne mes clients de l'idéation à l'industrialisation
-            </p>
-            <div class="social-links">
-                <a href="https://www.linkedin.com/in/clément-peponnet-b26906194" target="_blank" class="social-link">
-                    <svg width="20" height="20" fill="currentColor" viewBox="0 0 24 24">
-                        <path d="M19 0h-14c-2.761 0-5 2.239-5 5v14c0 2.761 2.239 5 5 5h14c2.762 0 5-2.239 5-5v-14c0-2.761-2.238-5-5-5zm-11 19h-3v-11h3v11zm-1.5-12.268c-.966 0-1.75-.79-1.75-1.764s.784-1.764 1.75-1.764 1.75.79 1.75 1.764-.783 1.764-1.75 1.764zm13.5 12.268h-3v-5.604c0-3.368-4-3.113-4 0v5.604h-3v-11h3v1.765c1.396-2.586 7-2.777 7 2.476v6.759z"/>
-                    </svg>
-                    LinkedIn
-                </a>
-                <a href="https://github.com/clemenpep" target="_blank" class="social-link">
-                    <svg width="20" height="20" fill="currentColor" viewBox="0 0 24 24">
-                        <path d="M12 0c-6.626 0-12 5.373-12 12 0 5.302 3.438 9.8 8.207 11.387.599.111.793-.261.793-.577v-2.234c-3.338.726-4.033-1.416-4.033-1.416-.546-1.387-1.333-1.756-1.333-1.756-1.089-.745.083-.729.083-.729 1.205.084 1.839 1.237 1.839 1.237 1.07 1.834 2.807 1.304 3.492.997.107-.775.418-1.305.762-1.604-2.665-.305-5.467-1.334-5.467-5.931 0-1.311.469-2.381 1.236-3.221-.124-.303-.535-1.524.117-3.176 0 0 1.008-.322 3.301 1.23.957-.266 1.983-.399 3.003-.404 1.02.005 2.047.138 3.006.404 2.291-1.552 3.297-1.23 3.297-1.23.653 1.653.242 2.874.118 3.176.77.84 1.235 1.911 1.235 3.221 0 4.609-2.807 5.624-5.479 5.921.43.372.823 1.102.823 2.222v3.293c0 .319.192.694.801.576 4.765-1.589 8.199-6.086 8.199-11.386 0-6.627-5.373-12-12-12z"/>
-                    </svg>
-                    GitHub
-                </a>
-            </div>
-        </div>
-        """
-        )
+        header_html = gr.HTML(generate_header_html())
 
         # Stats section
-        gr.HTML(
-            f"""
-        <div class="stats-container">
-            <div class="stat-card">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">🚀</div>
-                <div class="stat-value">{len(PORTFOLIO['experiences'])}</div>
-                <div class="stat-label">Projets GenAI majeurs</div>
-            </div>
-            <div class="stat-card">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">🏆</div>
-                <div class="stat-value">{len(PORTFOLIO['certifications'])}</div>
-                <div class="stat-label">Certifications AI</div>
-            </div>
-            <div class="stat-card">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">💼</div>
-                <div class="stat-value">50+</div>
-                <div class="stat-label">Pitchs GenAI</div>
-            </div>
-            <div class="stat-card">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">👥</div>
-                <div class="stat-value">6000+</div>
-                <div class="stat-label">Utilisateurs produits</div>
-            </div>
-        </div>
-        """
-        )
+        stats_html = gr.HTML(generate_stats_html())
 
         # Navigation tabs
         with gr.Row():
-            exp_btn = gr.Button("🚀 Expériences", elem_classes="nav-button")
-            skills_btn = gr.Button("💡 Expertise & Skills", elem_classes="nav-button")
-            cert_btn = gr.Button("🏆 Certifications", elem_classes="nav-button")
-            edu_btn = gr.Button("🎓 Études", elem_classes="nav-button")
+            exp_btn = gr.Button(CATEGORY_LABELS["experiences"], elem_classes="nav-button")
+            skills_btn = gr.Button(CATEGORY_LABELS["skills"], elem_classes="nav-button")
+            cert_btn = gr.Button(CATEGORY_LABELS["certifications"], elem_classes="nav-button")
+            edu_btn = gr.Button(CATEGORY_LABELS["education"], elem_classes="nav-button")
+
+        # Fuzzy search: jumps the carousel to the best hit
+        search_box = gr.Textbox(
+            placeholder="🔎 Rechercher dans le portfolio (ex: Azur, smolagent, Arts et Metiers)",
+            show_label=False,
+            lines=1,
+            elem_id="portfolio-search",
+        )
 
         # Carousel display with proper alignment
         gr.HTML('<div style="margin: 3rem 0 1rem 0;"></div>')  # Spacer
@@ -1014,13 +4502,17 @@ def create_interface():
             # center column takes most space -> scale=6
             with gr.Column(scale=6, elem_classes="carousel-container"):
                 carousel_html = gr.HTML(
-                    generate_card_html(PORTFOLIO["experiences"][0], "experiences")
+                    generate_card_html(
+                        current_snapshot().records["experiences"][0], "experiences"
+                    )
                 )
             next_btn = gr.Button("▶", elem_classes="carousel-nav-btn", scale=1)
 
         # Timeline with navigation hint
         timeline_html = gr.HTML(
-            generate_timeline_html(PORTFOLIO["experiences"], 0, "experiences")
+            generate_timeline_html(
+                current_snapshot().records["experiences"], 0, "experiences"
+            )
         )
 
         # Hidden index input for JavaScript communication
@@ -1047,31 +4539,50 @@ def create_interface():
         """
         )
 
-        # Navigation functions
-        def update_category(category: str):
-            items = PORTFOLIO.get(category, [])
+        # Navigation functions: every handler first binds the request's profile
+        @profiled("load_profile")
+        def load_profile(request: gr.Request):
+            """Render the profile-specific sections on page load"""
+            snapshot = activate_profile(request)
+            items = snapshot.records["experiences"]
+            card = generate_card_html(items[0], "experiences") if items else ""
+            timeline = generate_timeline_html(items, 0, "experiences")
+            return generate_header_html(), generate_stats_html(), card, timeline
+
+        @profiled("update_category")
+        def update_category(category: str, request: gr.Request):
+            items = activate_profile(request).records.get(category, [])
             if items:
                 card = generate_card_html(items[0], category)
                 timeline = generate_timeline_html(items, 0, category)
                 return card, timeline, category, 0, -1
             return carousel_html.value, timeline_html.value, category, 0, -1
 
-        def navigate_carousel(direction: int, category: str, current_index: int):
-            items = PORTFOLIO.get(category, [])
+        @profiled("navigate_carousel")
+        def navigate_carousel(
+            direction: int, category: str, current_index: int, request: gr.Request
+        ):
+            items = activate_profile(request).records.get(category, [])
             if not items:
                 return carousel_html.value, timeline_html.value, current_index, -1
 
-            new_index = (current_index + direction) % len(items)
+            # Arrows follow the timeline's chronological order
+            index = category_date_index(category, items)
+            position = (index.rank[current_index] + direction) % len(items)
+            new_index = index.order[position]
             card = generate_card_html(items[new_index], category)
             timeline = generate_timeline_html(items, new_index, category)
             return card, timeline, new_index, -1
 
-        def jump_to_timeline_index(jump_index: int, category: str, current_index: int):
+        @profiled("jump_to_timeline_index")
+        def jump_to_timeline_index(
+            jump_index: int, category: str, current_index: int, request: gr.Request
+        ):
             """Handle timeline click navigation"""
             if jump_index < 0:  # No jump requested
                 return carousel_html.value, timeline_html.value, current_index, -1
 
-            items = PORTFOLIO.get(category, [])
+            items = activate_profile(request).records.get(category, [])
             if not items or jump_index >= len(items):
                 return carousel_html.value, timeline_html.value, current_index, -1
 
@@ -1079,9 +4590,26 @@ def create_interface():
             timeline = generate_timeline_html(items, jump_index, category)
             return card, timeline, jump_index, -1
 
-        # Connect navigation buttons
+        # Connect navigation buttons; Gradio only injects gr.Request into
+        # functions annotated with it, hence factories instead of lambdas
+        def select_category(category: str):
+            def handler(request: gr.Request):
+                return update_category(category, request)
+
+            return handler
+
+        def step_carousel(direction: int):
+            def handler(category: str, current_index: int, request: gr.Request):
+                return navigate_carousel(direction, category, current_index, request)
+
+            return handler
+
+        app.load(
+            load_profile,
+            outputs=[header_html, stats_html, carousel_html, timeline_html],
+        )
         exp_btn.click(
-            lambda: update_category("experiences"),
+            select_category("experiences"),
             outputs=[
                 carousel_html,
                 timeline_html,
@@ -1091,7 +4619,7 @@ def create_interface():
             ],
         )
         skills_btn.click(
-            lambda: update_category("skills"),
+            select_category("skills"),
             outputs=[
                 carousel_html,
                 timeline_html,
@@ -1101,7 +4629,7 @@ def create_interface():
             ],
         )
         cert_btn.click(
-            lambda: update_category("certifications"),
+            select_category("certifications"),
             outputs=[
                 carousel_html,
                 timeline_html,
@@ -1111,7 +4639,7 @@ def create_interface():
             ],
         )
         edu_btn.click(
-            lambda: update_category("education"),
+            select_category("education"),
             outputs=[
                 carousel_html,
                 timeline_html,
@@ -1122,12 +4650,12 @@ def create_interface():
         )
 
         prev_btn.click(
-            lambda cat, idx: navigate_carousel(-1, cat, idx),
+            step_carousel(-1),
             inputs=[category_state, index_state],
             outputs=[carousel_html, timeline_html, index_state, timeline_jump_index],
         )
         next_btn.click(
-            lambda cat, idx: navigate_carousel(1, cat, idx),
+            step_carousel(1),
             inputs=[category_state, index_state],
             outputs=[carousel_html, timeline_html, index_state, timeline_jump_index],
         )
@@ -1139,6 +4667,29 @@ def create_interface():
             outputs=[carousel_html, timeline_html, index_state, timeline_jump_index],
         )
 
+        @profiled("search_portfolio")
+        def search_portfolio(
+            query: str, category: str, current_index: int, request: gr.Request
+        ):
+            """Jump to the best fuzzy match of the search box"""
+            snapshot = activate_profile(request)
+            hits = snapshot.search_index.search(query, limit=1)
+            if not hits:
+                # Keep the card on screen: component .value is the page's initial render
+                gr.Info(f"Aucun résultat pour « {query} »")
+                return gr.update(), gr.update(), category, current_index
+            hit = hits[0]
+            items = snapshot.records[hit["category"]]
+            card = generate_card_html(items[hit["index"]], hit["category"])
+            timeline = generate_timeline_html(items, hit["index"], hit["category"])
+            return card, timeline, hit["category"], hit["index"]
+
+        search_box.submit(
+            search_portfolio,
+            inputs=[search_box, category_state, index_state],
+            outputs=[carousel_html, timeline_html, category_state, index_state],
+        )
+
         # Chat interface
         gr.HTML(
             f"""
@@ -1151,7 +4702,7 @@ def create_interface():
                 <line x1="8" y1="16" x2="8" y2="16"></line>
                 <line x1="16" y1="16" x2="16" y2="16"></line>
             </svg>
-            <span>AI Agent specialized in Clément's profile</span>
+            <span>AI Agent specialized in this profile</span>
         </div>
         <p style="color: {COLORS['text_secondary']}; margin-bottom: 1.5rem; font-size: 0.95rem;">
             Posez vos questions sur le profil, les expériences GenAI, les compétences techniques ou demandez une analyse de correspondance avec vos besoins.
@@ -1189,43 +4740,426 @@ def create_interface():
             )
 
         gr.Examples(
-            examples=[
-                "Quels sont les projets avec des agents IA ?",
-                "Parle-moi de l'expérience avec MCP",
-                "Quelles technologies GenAI maîtrise Clément ?",
-                "Analyse le match pour : Senior GenAI Engineer avec Azure",
-            ],
+            examples=EXAMPLE_QUESTIONS,
             inputs=msg,
             label="Questions suggérées",
         )
 
-        # Chat functionality
-        msg.submit(chat_with_agent, [msg, chatbot], [msg, chatbot])
-        send_btn.click(chat_with_agent, [msg, chatbot], [msg, chatbot])
+        # Chat functionality: the history lives server-side (SESSIONS); the
+        # browser sends message + session id and appends the returned turn
+        session_id = gr.Textbox(visible=False)
+        last_turn = gr.JSON(visible=False)
+
+        app.load(None, outputs=[session_id], js=SESSION_ID_JS).then(
+            restore_session, [session_id], [chatbot]
+        )
+        if SPECULATION_ENABLED:
+            # Only the newest draft runs; stale ones are dropped server-side
+            msg.input(
+                prepare_draft,
+                [msg, session_id],
+                None,
+                trigger_mode="always_last",
+                show_progress="hidden",
+                concurrency_limit=SPECULATION_CONCURRENCY,
+            )
+
+        for trigger in (msg.submit, send_btn.click):
+            trigger(
+                chat_session_turn,
+                [msg, session_id],
+                [msg, last_turn],
+                concurrency_limit=AGENT_POOL_SIZE,
+            ).then(None, [chatbot, last_turn], [chatbot], js=APPEND_TURN_JS)
 
         # Footer
-        model_info = (
-            "Qwen2.5-Coder-32B (HuggingFace)"
-            if USE_HF_MODEL
-            else f"{os.getenv('LITELLM_MODEL', 'GPT-4o-mini')} (LiteLLM)"
+        gr.HTML(generate_footer_html())
+
+    return app
+
+
+# JSON REST API over the portfolio data and tool filters
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "20"))
+API_MAX_PAGE_SIZE = 100
+API_CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("API_CORS_ORIGINS", "").split(",")
+    if origin.strip()
+]
+
+
+def _encode_cursor(offset: int, version: str) -> str:
+    import base64
+
+    payload = json.dumps({"v": version, "o": offset}).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, version: str) -> int:
+    """Offset of a cursor; ValueError if malformed, LookupError if stale"""
+    import base64
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        offset = int(payload["o"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if payload["v"] != version:
+        raise LookupError("Portfolio changed since this cursor was issued")
+    return offset
+
+
+def create_api():
+    """
+    JSON API mounted at /api: categories, filtered entries and profile match.
+
+    Responses carry a weak ETag derived from the portfolio version and the
+    query, honour If-None-Match with 304, are gzip-compressed, and list
+    endpoints paginate with an opaque `cursor` / `next_cursor`. Every handler
+    serves the profile selected by ProfileRoutingMiddleware.
+    """
+    from fastapi import Body, FastAPI, HTTPException, Request, Response
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.middleware.gzip import GZipMiddleware
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    api = FastAPI(title="Portfolio API")
+    api.add_middleware(GZipMiddleware, minimum_size=500)
+
+    @api.exception_handler(UnknownProfileError)
+    def unknown_profile(request: Request, exc: UnknownProfileError):
+        return JSONResponse({"detail": f"Unknown profile '{exc}'"}, status_code=404)
+    if API_CORS_ORIGINS:
+        # The static export (export_static.py) calls /api/chat from its CDN origin
+        api.add_middleware(
+            CORSMiddleware,
+            allow_origins=API_CORS_ORIGINS,
+            allow_methods=["GET", "POST"],
+            allow_headers=["*"],
+            expose_headers=["ETag"],
         )
-        gr.HTML(
-            f"""
-        <div class="footer">
-            <p style="color: {COLORS['text_primary']}; font-size: 1rem; font-weight: 500; margin-bottom: 0.5rem;">
-                © 2025 Clément Peponnet - Portfolio GenAI & Agentic
-            </p>
-            <p style="color: {COLORS['text_secondary']}; font-size: 0.875rem;">
-                Built with Gradio & {model_info}
-            </p>
-        </div>
+
+    def cached_json(request: Request, payload_fn: Callable[[], Dict]) -> Response:
+        version = current_snapshot().version
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.items()))
+        digest = hashlib.sha1(f"{request.url.path}?{query}".encode("utf-8")).hexdigest()
+        etag = f'W/"{version}-{digest[:12]}"'
+        # The snapshot (hence the version) depends on the requested language
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Language"}
+
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(payload_fn(), headers=headers)
+
+    def page(items: List, cursor: Optional[str], limit: int) -> Dict:
+        version = current_snapshot().version
+        limit = max(1, min(limit, API_MAX_PAGE_SIZE))
+        try:
+            offset = _decode_cursor(cursor, version) if cursor else 0
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=410, detail=str(e))
+
+        end = offset + limit
+        return {
+            "version": version,
+            "total": len(items),
+            "items": [record_data(record) for record in items[offset:end]],
+            "next_cursor": _encode_cursor(end, version) if end < len(items) else None,
+        }
+
+    @api.get("/portfolio")
+    def categories(request: Request):
+        snapshot = activate_profile(request)
+        return cached_json(
+            request,
+            lambda: {
+                "version": snapshot.version,
+                "profile": snapshot.name,
+                "language": snapshot.language,
+                "categories": [
+                    {"name": name, "count": len(snapshot.records[name])}
+                    for name in CATEGORIES
+                ],
+            },
+        )
+
+    @api.get("/experiences")
+    def experiences(
+        request: Request,
+        technology: Optional[str] = None,
+        client: Optional[str] = None,
+        sector: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = API_PAGE_SIZE,
+    ):
+        activate_profile(request)
+        return cached_json(
+            request,
+            lambda: page(filter_experiences(technology, client, sector), cursor, limit),
+        )
+
+    @api.get("/skills")
+    def skills(
+        request: Request,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = API_PAGE_SIZE,
+    ):
+        activate_profile(request)
+        return cached_json(request, lambda: page(filter_skills(category), cursor, limit))
+
+    @api.get("/certifications")
+    def certifications(request: Request, cursor: Optional[str] = None, limit: int = API_PAGE_SIZE):
+        snapshot = activate_profile(request)
+        return cached_json(
+            request, lambda: page(snapshot.records["certifications"], cursor, limit)
+        )
+
+    @api.get("/education")
+    def education(request: Request, cursor: Optional[str] = None, limit: int = API_PAGE_SIZE):
+        snapshot = activate_profile(request)
+        return cached_json(
+            request, lambda: page(snapshot.records["education"], cursor, limit)
+        )
+
+    @api.get("/match")
+    def match(request: Request, requirements: str):
+        snapshot = activate_profile(request)
+
+        def payload():
+            matches = snapshot.match_index.score(requirements)
+            return {
+                "version": snapshot.version,
+                "requirements": requirements,
+                "strength": matches["strength"],
+                "level": match_level(matches["strength"])[0],
+                "experiences": matches["experiences"],
+                "skills": list(dict.fromkeys(matches["skills"])),
+            }
+
+        return cached_json(request, payload)
+
+    @api.post("/chat")
+    def chat(
+        request: Request,
+        message: str = Body(...),
+        session_id: Optional[str] = Body(None),
+        history: List[List[str]] = Body([]),
+    ):
+        """
+        Answer one chat turn; used by the static export's chat widget.
+
+        With a session_id the history comes from the server-side store and
+        `history` is ignored.
         """
+        if session_id:
+            _, turn = chat_session_turn(message, session_id, request)
+            return {"response": turn[1]}
+        _, updated = chat_with_agent(message, [tuple(turn) for turn in history], request)
+        return {"response": updated[-1][1]}
+
+    @api.get("/chat/{session_id}")
+    def chat_history(request: Request, session_id: str):
+        """Stored turns of a session, to restore the widget after a reload"""
+        return {"history": restore_session(session_id, request)}
+
+    @api.post("/batch/match")
+    async def batch_match(request: Request, rank: bool = False):
+        """Score a CSV or JSONL body of job descriptions, streamed back as JSONL"""
+        profile = activate_profile(request).name
+        content_type = request.headers.get("content-type", "")
+        fmt = "csv" if "csv" in content_type else "jsonl"
+        try:
+            rows = parse_requirement_rows((await request.body()).decode("utf-8"), fmt)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        lines = (
+            json.dumps(result, ensure_ascii=False) + "\n"
+            for result in iter_batch_matches(rows, rank=rank, profile=profile)
         )
+        return StreamingResponse(lines, media_type="application/x-ndjson")
 
-    return app
+    return api
+
+
+# Startup warm-up: readiness (/readyz) passes once the cold paths have run
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "180"))
+
+WARMUP = {"status": "pending", "steps": [], "elapsed_s": 0.0}
+
+
+def _warmup_steps() -> List[Tuple[str, Callable[[], None]]]:
+    """(name, action) pairs run in order by run_warmup"""
+    snapshot = current_snapshot()
+
+    def render_all() -> None:
+        generate_header_html()
+        generate_stats_html()
+        for category in CATEGORIES:
+            items = snapshot.records[category]
+            for index, item in enumerate(items):
+                generate_card_html(item, category)
+                generate_timeline_html(items, index, category)
+
+    steps = [("http_pools", prewarm_http_pools), ("render_cards", render_all)]
+    if not USE_HF_MODEL:
+        steps.append(("embeddings", lambda: snapshot.embedding_index))
+    def answer(question: str) -> None:
+        # Straight to the LLM: chat_with_agent turns failures into a chat
+        # reply or a fallback answer, which would pass for success here
+        question_snapshot = select_snapshot(question, None)
+        cache_key = AnswerCache.key(question_snapshot, question)
+        if cache_key not in ANSWERS:
+            ANSWERS.put(cache_key, generate_answer(question, [], question_snapshot))
+
+    steps += [
+        (f"answer: {question}", lambda question=question: answer(question))
+        for question in EXAMPLE_QUESTIONS
+    ]
+    return steps
+
+
+def run_warmup(timeout: float = WARMUP_TIMEOUT_SECONDS) -> Dict:
+    """
+    Run every warm-up step in a worker thread, recording progress in WARMUP.
+
+    Returns once all steps are done or the timeout expires; either way the
+    app then reports ready (a slow provider must not block the deploy).
+    """
+    started = time.perf_counter()
+    steps = _warmup_steps()
+    WARMUP.update(status="running", steps=[{"name": name, "status": "pending"} for name, _ in steps])
+
+    def work() -> None:
+        for position, (name, action) in enumerate(steps):
+            step = WARMUP["steps"][position]
+            step["status"] = "running"
+            step_started = time.perf_counter()
+            try:
+                action()
+                step["status"] = "done"
+            except Exception as e:
+                step.update(status="failed", error=str(e))
+            step["seconds"] = round(time.perf_counter() - step_started, 3)
+            print(f"Warm-up {position + 1}/{len(steps)} {step['status']}: {name} ({step['seconds']}s)")
+
+    worker = threading.Thread(target=work, name="warmup", daemon=True)
+    worker.start()
+    worker.join(timeout)
+    WARMUP["status"] = "timed_out" if worker.is_alive() else "ready"
+    WARMUP["elapsed_s"] = round(time.perf_counter() - started, 3)
+    METRICS.observe("warmup", WARMUP["elapsed_s"])
+    print(f"Warm-up {WARMUP['status']} after {WARMUP['elapsed_s']}s")
+    return WARMUP
+
+
+def start_warmup() -> None:
+    """Warm up in the background so /healthz answers while /readyz waits"""
+    if WARMUP_ENABLED:
+        threading.Thread(target=run_warmup, name="warmup-monitor", daemon=True).start()
+    else:
+        WARMUP["status"] = "ready"
+
+
+# Create the ASGI server: Gradio UI plus operational routes
+def create_server():
+    """
+    Mount the Gradio interface and the JSON API on one FastAPI app.
+
+    Every profile shares this app, the agent pool and the /logos assets;
+    ProfileRoutingMiddleware picks the portfolio per request.
+    """
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.responses import FileResponse, JSONResponse
+    from fastapi.staticfiles import StaticFiles
+
+    server = FastAPI()
+
+    def require_admin(request: Request) -> None:
+        """Admin routes need ADMIN_TOKEN as a bearer token (never in the URL, which gets logged)"""
+        import hmac
+
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ")
+        if not ADMIN_TOKEN or not hmac.compare_digest(
+            supplied.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")
+        ):
+            raise HTTPException(status_code=404)
+
+    server.add_middleware(ProfileRoutingMiddleware)
+
+    @server.get("/metrics")
+    def metrics():
+        return METRICS.snapshot()
+
+    @server.get("/healthz")
+    def healthz():
+        return {"status": "ok"}
+
+    @server.get("/readyz")
+    def readyz():
+        """503 until the startup warm-up has finished (or timed out)"""
+        ready = WARMUP["status"] in ("ready", "timed_out")
+        return JSONResponse(WARMUP, status_code=200 if ready else 503)
+
+    @server.get("/admin/usage")
+    def usage_report(request: Request, days: int = 7):
+        """Token and cost totals per day, model and most expensive sessions"""
+        require_admin(request)
+        return {"live": USAGE.stats(), **USAGE.report(days)}
+
+    @server.get("/admin/memory")
+    def memory_report(request: Request, against: str = "previous", top: int = 15):
+        """RSS history, component sizes and allocation growth (against=previous|baseline)"""
+        require_admin(request)
+        if against not in ("previous", "baseline"):
+            raise HTTPException(status_code=400, detail="against must be previous or baseline")
+        return MEMORY.report(against, max(1, min(top, 100)))
+
+    @server.get("/admin/flamegraphs")
+    def list_flamegraphs(request: Request):
+        """Captured flamegraphs, newest first"""
+        require_admin(request)
+        if not os.path.isdir(PROFILING_DIR):
+            return {"flamegraphs": []}
+        names = sorted(os.listdir(PROFILING_DIR), reverse=True)
+        return {
+            "flamegraphs": [
+                {"name": n, "bytes": os.path.getsize(os.path.join(PROFILING_DIR, n))}
+                for n in names
+            ]
+        }
+
+    @server.get("/admin/flamegraphs/{name}")
+    def download_flamegraph(request: Request, name: str):
+        require_admin(request)
+        path = os.path.join(PROFILING_DIR, os.path.basename(name))
+        if not os.path.isfile(path):
+            raise HTTPException(status_code=404, detail="No such flamegraph")
+        media_type = "image/svg+xml" if name.endswith(".svg") else "text/plain"
+        return FileResponse(path, media_type=media_type)
+
+    server.mount("/api", create_api())
+    server.mount("/logos", StaticFiles(directory=logos_path), name="logos")
+
+    app = create_interface()
+    app.show_error = True
+    return gr.mount_gradio_app(server, app, path="/")
 
 
 # Launch application
 if __name__ == "__main__":
-    app = create_interface()
-    app.launch(server_name="0.0.0.0", server_port=7860, debug=True, show_error=True)
+    import uvicorn
+
+    start_batch_pool()  # first: forks must happen before any other thread starts
+    start_warmup()
+    MEMORY.start()
+    uvicorn.run(
+        create_server(),
+        host=os.getenv("GRADIO_SERVER_NAME", "0.0.0.0"),
+        port=int(os.getenv("GRADIO_SERVER_PORT", "7860")),
+    )
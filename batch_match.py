@@ -0,0 +1,58 @@
+"""
+Batch job-description matching against the portfolio.
+
+Scores every row of a CSV or JSONL file with the same logic as the
+`analyze_profile_match` tool, in parallel across a process pool, and writes
+one JSON result per line.
+
+Usage:
+    python batch_match.py jobs.csv > results.jsonl
+    python batch_match.py jobs.jsonl --workers 8 --rank -o results.jsonl
+"""
+
+import argparse
+import json
+import sys
+
+from app import (
+    BATCH_WORKERS,
+    DEFAULT_PROFILE,
+    iter_batch_matches,
+    parse_requirement_rows,
+    start_batch_pool,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", help="CSV or JSONL file of job descriptions ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from extension)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Worker processes")
+    parser.add_argument("--rank", action="store_true", help="Sort results by match strength")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="Portfolio profile to match against")
+    args = parser.parse_args()
+    start_batch_pool(args.workers)
+
+    fmt = args.format or ("csv" if args.input.endswith(".csv") else "jsonl")
+    if args.input == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            text = f.read()
+
+    rows = parse_requirement_rows(text, fmt)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for result in iter_batch_matches(
+            rows, workers=args.workers, rank=args.rank, profile=args.profile
+        ):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
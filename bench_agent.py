@@ -0,0 +1,100 @@
+"""
+Benchmark: our own chat overhead, with LLM calls replayed from a cassette.
+
+Record the suggested questions once against the real provider, then
+replay them offline: model latency drops out, so the timings measure agent
+orchestration, tool execution, prompt building and rendering only.
+
+Usage:
+    LLM_CASSETTE_MODE=record python bench_agent.py --repeat 1
+    python bench_agent.py --repeat 20 --max-ms 50 > bench_output.txt
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Replay unless the caller asked to record
+os.environ.setdefault("LLM_CASSETTE_MODE", "replay")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+
+from app import (  # noqa: E402
+    ANSWERS,
+    CATEGORIES,
+    EXAMPLE_QUESTIONS,
+    LLM_CASSETTE_MODE,
+    LLM_CASSETTE_PATH,
+    chat_with_agent,
+    current_snapshot,
+    generate_card_html,
+    generate_timeline_html,
+)
+
+
+def percentile(samples, share: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def time_turns(questions, repeat: int):
+    """Per-question turn durations (s) and the number of failed turns"""
+    timings = {question: [] for question in questions}
+    failures = 0
+    for _ in range(repeat):
+        for question in questions:
+            ANSWERS.clear()  # measure the full turn, not the answer cache
+            started = time.perf_counter()
+            _, history = chat_with_agent(question, [])
+            timings[question].append(time.perf_counter() - started)
+            if history[-1][1].startswith("I encountered an error"):
+                failures += 1
+                print(f"failed: {question}: {history[-1][1]}", file=sys.stderr)
+    return timings, failures
+
+
+def time_rendering(repeat: int) -> float:
+    """Mean time (s) to render every card and timeline once"""
+    records = current_snapshot().records
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for category in CATEGORIES:
+            items = records[category]
+            for index, item in enumerate(items):
+                generate_card_html(item, category)
+                generate_timeline_html(items, index, category)
+    return (time.perf_counter() - started) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the questions")
+    parser.add_argument(
+        "--max-ms", type=float, help="Fail (exit 1) if the mean turn exceeds this, for CI"
+    )
+    args = parser.parse_args()
+
+    timings, failures = time_turns(EXAMPLE_QUESTIONS, args.repeat)
+    render_s = time_rendering(args.repeat)
+
+    print(f"cassette: {LLM_CASSETTE_MODE} ({LLM_CASSETTE_PATH})")
+    print(f"{'question':<60}{'mean ms':>10}{'p95 ms':>10}")
+    for question, samples in timings.items():
+        print(
+            f"{question[:58]:<60}{statistics.mean(samples) * 1000:>10.1f}"
+            f"{percentile(samples, 0.95) * 1000:>10.1f}"
+        )
+    all_samples = [sample for samples in timings.values() for sample in samples]
+    mean_ms = statistics.mean(all_samples) * 1000
+    print(f"{'all turns':<60}{mean_ms:>10.1f}{percentile(all_samples, 0.95) * 1000:>10.1f}")
+    print(f"render all cards + timelines: {render_s * 1000:.1f} ms")
+
+    if failures:
+        sys.exit(f"{failures} turn(s) failed")
+    if args.max_ms is not None and mean_ms > args.max_ms:
+        sys.exit(f"mean turn {mean_ms:.1f} ms exceeds --max-ms {args.max_ms}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: typed slotted records vs raw YAML dicts.
+
+Measures the retained memory of N parsed copies of portfolio_data.yaml in
+both representations, and the cost of resolving the card display fields
+(subtitle / description / duration / badges) on every entry.
+
+Usage:
+    python bench_records.py --copies 1000 > bench_output.txt
+"""
+
+import argparse
+import gc
+import timeit
+import tracemalloc
+
+import yaml
+
+from app import CATEGORIES, build_records
+
+
+def retained_bytes(build, copies: int) -> int:
+    """Memory still allocated after building `copies` instances"""
+    gc.collect()
+    tracemalloc.start()
+    kept = [build() for _ in range(copies)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def dict_card_fields(item):
+    return (
+        item.get("client", item.get("issuer", item.get("school", ""))),
+        item.get("description", item.get("focus", "")),
+        item.get("duration", item.get("year", "")),
+        item.get("technologies", item.get("skills", []))[:6],
+    )
+
+
+def record_card_fields(record):
+    card = record.card
+    return card.subtitle, card.description, card.duration, card.badges
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--copies", type=int, default=1000, help="Parsed copies kept in memory")
+    parser.add_argument("--repeat", type=int, default=2000, help="Field-resolution passes")
+    args = parser.parse_args()
+
+    with open("portfolio_data.yaml", "r", encoding="utf-8") as f:
+        text = f.read()
+
+    dict_bytes = retained_bytes(lambda: yaml.safe_load(text), args.copies)
+    record_bytes = retained_bytes(lambda: build_records(yaml.safe_load(text)), args.copies)
+
+    portfolio = yaml.safe_load(text)
+    records = build_records(portfolio)
+    items = [item for category in CATEGORIES for item in portfolio.get(category, [])]
+    flat_records = [record for category in CATEGORIES for record in records[category]]
+
+    dict_time = timeit.timeit(
+        lambda: [dict_card_fields(item) for item in items], number=args.repeat
+    )
+    record_time = timeit.timeit(
+        lambda: [record_card_fields(record) for record in flat_records], number=args.repeat
+    )
+    lookups = len(items) * args.repeat
+
+    print(f"{'representation':<16}{'memory / copy':>16}{'ns / entry':>14}")
+    print(f"{'dict':<16}{dict_bytes / args.copies / 1024:>13.1f} KB{dict_time / lookups * 1e9:>14.0f}")
+    print(f"{'records':<16}{record_bytes / args.copies / 1024:>13.1f} KB{record_time / lookups * 1e9:>14.0f}")
+    print(
+        f"records/dict: memory x{record_bytes / dict_bytes:.2f}, "
+        f"field access x{record_time / dict_time:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
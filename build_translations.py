@@ -0,0 +1,156 @@
+"""
+Build-time translation of the portfolio text fields.
+
+Translates every free-text field (titles, descriptions, impacts, profile
+header...) of each profile into the target languages with the configured
+LLM, and stores them in translations/<lang>.json keyed by the hash of the
+source text. Texts already translated are skipped, so after editing
+portfolio_data.yaml only the changed entries are sent to the model. The
+app serves the translated snapshot to visitors asking in that language.
+
+Usage:
+    python build_translations.py --lang en
+    python build_translations.py --lang en --lang de --profile jane --batch-size 10
+    python build_translations.py --lang en --prune
+"""
+
+import argparse
+import json
+import os
+import re
+
+from app import (
+    DEFAULT_PROFILE,
+    PORTFOLIO_LANGUAGE,
+    PROFILES_DIR,
+    TRANSLATIONS_DIR,
+    USE_HF_MODEL,
+    load_portfolio_data,
+    load_translations,
+    profile_path,
+    text_hash,
+    translatable_texts,
+    translations_path,
+    with_profile_defaults,
+)
+
+LANGUAGE_NAMES = {"fr": "French", "en": "English", "de": "German", "es": "Spanish", "it": "Italian"}
+
+PROMPT = """Translate each string of this JSON array from {source} to {target}.
+Keep product names, company names, technologies, numbers, emojis and any
+HTML or markdown exactly as they are. Reply with the JSON array of
+translations only, same length and same order.
+
+{texts}"""
+
+
+def all_profiles() -> list:
+    """The default profile plus every profiles/<name>.yaml and profiles/<name>/"""
+    names = [DEFAULT_PROFILE]
+    if os.path.isdir(PROFILES_DIR):
+        for entry in sorted(os.listdir(PROFILES_DIR)):
+            name = entry[: -len(".yaml")] if entry.endswith(".yaml") else entry
+            if name not in names:
+                try:
+                    profile_path(name)
+                except LookupError:
+                    continue
+                names.append(name)
+    return names
+
+
+def ask_llm(prompt: str) -> str:
+    """One deterministic completion from the app's model (cassettes apply)"""
+    if USE_HF_MODEL:
+        from smolagents.models import ChatMessage
+
+        from app import model
+
+        message = ChatMessage(role="user", content=[{"type": "text", "text": prompt}])
+        return model.generate([message]).content
+
+    from app import completion
+
+    response = completion(
+        model=os.getenv("LITELLM_MODEL", "gpt-4o-mini"),
+        messages=[{"role": "user", "content": prompt}],
+        api_key=os.getenv("OPENAI_API_KEY"),
+        temperature=0,
+    )
+    return response.choices[0].message.content
+
+
+def translate_batch(texts: list, language: str) -> list:
+    """Translations of texts, in order; falls back to one call per text on a bad reply"""
+    prompt = PROMPT.format(
+        source=LANGUAGE_NAMES.get(PORTFOLIO_LANGUAGE, PORTFOLIO_LANGUAGE),
+        target=LANGUAGE_NAMES.get(language, language),
+        texts=json.dumps(texts, ensure_ascii=False, indent=1),
+    )
+    reply = ask_llm(prompt)
+    match = re.search(r"\[.*\]", reply, re.DOTALL)
+    try:
+        translated = json.loads(match.group(0)) if match else None
+    except json.JSONDecodeError:
+        translated = None
+
+    if isinstance(translated, list) and len(translated) == len(texts):
+        return [str(t) for t in translated]
+    if len(texts) == 1:
+        raise ValueError(f"Unusable translation reply: {reply[:200]!r}")
+    return [translate_batch([text], language)[0] for text in texts]
+
+
+def save(language: str, translations: dict) -> None:
+    os.makedirs(TRANSLATIONS_DIR, exist_ok=True)
+    path = translations_path(language)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(translations, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def build(language: str, texts: list, batch_size: int, prune: bool) -> None:
+    translations = load_translations(language)
+    missing = [text for text in texts if text_hash(text) not in translations]
+    print(f"{language}: {len(texts)} texts, {len(missing)} to translate")
+
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start : start + batch_size]
+        for text, translated in zip(batch, translate_batch(batch, language)):
+            translations[text_hash(text)] = translated
+        # Saved per batch: an interrupted build resumes where it stopped
+        save(language, translations)
+        print(f"  {min(start + batch_size, len(missing))}/{len(missing)}")
+
+    if prune:
+        used = {text_hash(text) for text in texts}
+        stale = [key for key in translations if key not in used]
+        for key in stale:
+            del translations[key]
+        print(f"  pruned {len(stale)} stale entries")
+    save(language, translations)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lang", action="append", required=True, help="Target language code (repeatable)")
+    parser.add_argument("--profile", action="append", help="Profile to translate (default: all)")
+    parser.add_argument("--batch-size", type=int, default=20, help="Texts per LLM call")
+    parser.add_argument(
+        "--prune", action="store_true", help="Drop translations no selected profile uses anymore"
+    )
+    args = parser.parse_args()
+
+    texts = {}
+    for name in args.profile or all_profiles():
+        data = with_profile_defaults(load_portfolio_data(profile_path(name)))
+        texts.update(dict.fromkeys(translatable_texts(data)))
+
+    for language in args.lang:
+        if language == PORTFOLIO_LANGUAGE:
+            parser.error(f"{language} is the portfolio's own language")
+        build(language, list(texts), args.batch_size, args.prune)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Static export of the portfolio section.
+
+Pre-renders the header, stats, every category's cards and timelines (with
+the app's CUSTOM_CSS) into a bundle a CDN can serve. Navigation runs
+entirely in the browser; only the chat widget calls the Python backend
+(POST /api/chat, with the conversation stored server-side).
+
+Usage:
+    python export_static.py --out dist --backend-url https://portfolio.example.com
+    python export_static.py --profile jane --out dist/jane --backend-url https://portfolio.example.com/p/jane
+    python export_static.py --lang en --out dist/en
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import shutil
+
+from app import (
+    CATEGORIES,
+    CATEGORY_LABELS,
+    COLORS,
+    CUSTOM_CSS,
+    DEFAULT_PROFILE,
+    EXAMPLE_QUESTIONS,
+    PORTFOLIO_LANGUAGE,
+    SNAPSHOTS,
+    available_languages,
+    category_date_index,
+    current_snapshot,
+    generate_card_html,
+    generate_footer_html,
+    generate_header_html,
+    generate_stats_html,
+    generate_timeline_html,
+    logos_path,
+    use_snapshot,
+)
+
+# Styles the Gradio layout provided implicitly
+STATIC_CSS = f"""
+body {{ margin: 0; background: {COLORS['background']}; }}
+.nav-row {{ display: flex; gap: 1rem; }}
+.nav-row .nav-button {{ flex: 1; }}
+.nav-button.selected {{ background: {COLORS['primary']} !important; color: white !important; }}
+.static-slide[hidden], .static-timeline[hidden] {{ display: none; }}
+.chat-log {{ height: 400px; overflow-y: auto; padding: 1rem; margin-bottom: 1rem; }}
+.chat-log .message {{ padding: 0.75rem 1rem; white-space: pre-wrap; max-width: 85%; }}
+.chat-log .message.user {{ margin-left: auto !important; color: white; }}
+.chat-form {{ display: flex; }}
+.chat-form input {{ flex: 1; }}
+.chat-examples {{ display: flex; flex-wrap: wrap; gap: 0.5rem; margin-top: 1rem; }}
+.chat-examples button {{ border: 1px solid {COLORS['border']}; background: {COLORS['surface']}; border-radius: 12px; padding: 0.4rem 0.8rem; cursor: pointer; }}
+"""
+
+STATIC_JS = """
+(function () {
+  var state = { category: "experiences", index: 0 };
+  var backend = document.body.dataset.backend || "";
+  // Same id as the Gradio UI: the conversation is stored server-side
+  var sessionId = localStorage.getItem("portfolio-session-id");
+  if (!sessionId) {
+    sessionId = Array.from(crypto.getRandomValues(new Uint8Array(16)), function (b) {
+      return b.toString(16).padStart(2, "0");
+    }).join("");
+    localStorage.setItem("portfolio-session-id", sessionId);
+  }
+
+  function slidesOf(category) {
+    return Array.prototype.slice.call(document.querySelectorAll('.static-slide[data-category="' + category + '"]'));
+  }
+
+  function show(category, index) {
+    if (!slidesOf(category).length) return;
+    state = { category: category, index: index };
+    document.querySelectorAll(".static-slide").forEach(function (el) {
+      el.hidden = !(el.dataset.category === category && +el.dataset.index === index);
+    });
+    document.querySelectorAll(".static-timeline").forEach(function (el) {
+      el.hidden = el.dataset.category !== category;
+    });
+    document.querySelectorAll('.static-timeline[data-category="' + category + '"] .timeline-item')
+      .forEach(function (el) { el.classList.toggle("active", +el.dataset.index === index); });
+    document.querySelectorAll(".nav-button").forEach(function (el) {
+      el.classList.toggle("selected", el.dataset.category === category);
+    });
+  }
+
+  window.jumpToCard = function (index) { show(state.category, index); };
+  document.querySelectorAll(".nav-button").forEach(function (el) {
+    el.addEventListener("click", function () { show(el.dataset.category, 0); });
+  });
+  // Slides are emitted in chronological order: arrows step through the DOM order
+  function step(direction) {
+    var slides = slidesOf(state.category);
+    var position = slides.findIndex(function (el) { return +el.dataset.index === state.index; });
+    position = (position + direction + slides.length) % slides.length;
+    show(state.category, +slides[position].dataset.index);
+  }
+  document.getElementById("prev-btn").addEventListener("click", function () { step(-1); });
+  document.getElementById("next-btn").addEventListener("click", function () { step(1); });
+
+  var log = document.getElementById("chat-log");
+  var input = document.getElementById("msg-input");
+
+  function append(role, text) {
+    var el = document.createElement("div");
+    el.className = "message " + role;
+    el.textContent = text;
+    log.appendChild(el);
+    log.scrollTop = log.scrollHeight;
+    return el;
+  }
+
+  document.getElementById("chat-form").addEventListener("submit", function (event) {
+    event.preventDefault();
+    var message = input.value.trim();
+    if (!message) return;
+    input.value = "";
+    append("user", message);
+    var pending = append("bot", "…");
+    fetch(backend + "/api/chat", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ message: message, session_id: sessionId })
+    })
+      .then(function (r) { return r.json(); })
+      .then(function (data) { pending.textContent = data.response; })
+      .catch(function (err) { pending.textContent = "I encountered an error: " + err + ". Please try again."; });
+  });
+  document.querySelectorAll(".chat-examples button").forEach(function (el) {
+    el.addEventListener("click", function () { input.value = el.textContent; input.focus(); });
+  });
+
+  fetch(backend + "/api/chat/" + sessionId)
+    .then(function (r) { return r.json(); })
+    .then(function (data) {
+      data.history.forEach(function (turn) { append("user", turn[0]); append("bot", turn[1]); });
+    })
+    .catch(function () {});
+
+  show("experiences", 0);
+})();
+"""
+
+
+def hashed_name(name: str, content: bytes) -> str:
+    """app.css -> app.<hash>.css, so assets can be cached forever"""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:10]}{ext}"
+
+
+def write_asset(out_dir: str, name: str, content: bytes, manifest: dict) -> str:
+    filename = hashed_name(name, content)
+    with open(os.path.join(out_dir, "assets", filename), "wb") as f:
+        f.write(content)
+    manifest[name] = f"assets/{filename}"
+    return manifest[name]
+
+
+def render_slides() -> str:
+    """Every card of every category in timeline order, shown one at a time client-side"""
+    records = current_snapshot().records
+    sections = []
+    for category in CATEGORIES:
+        items = records[category]
+        for index in category_date_index(category, items).order:
+            item = items[index]
+            sections.append(
+                f'<div class="static-slide" data-category="{category}" data-index="{index}" hidden>'
+                f"{generate_card_html(item, category)}</div>"
+            )
+    return "\n".join(sections)
+
+
+def render_timelines() -> str:
+    records = current_snapshot().records
+    return "\n".join(
+        f'<div class="static-timeline" data-category="{category}" hidden>'
+        # Full timeline: the active dot is toggled client-side
+        f"{generate_timeline_html(records[category], -1, category, window=0)}</div>"
+        for category in CATEGORIES
+        if records[category]
+    )
+
+
+def render_index(css_path: str, js_path: str, avatar_path: str, backend_url: str) -> str:
+    nav = "\n".join(
+        f'<button class="nav-button" data-category="{category}">{label}</button>'
+        for category, label in CATEGORY_LABELS.items()
+    )
+    snapshot = current_snapshot()
+    examples = "\n".join(
+        f"<button type=\"button\">{html.escape(question)}</button>" for question in EXAMPLE_QUESTIONS
+    )
+    return f"""<!DOCTYPE html>
+<html lang="{snapshot.language}">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<meta name="portfolio-version" content="{snapshot.version}">
+<title>{snapshot.profile['name']} - {snapshot.profile['title']}</title>
+<link rel="stylesheet" href="{css_path}">
+</head>
+<body data-backend="{html.escape(backend_url.rstrip('/'))}">
+<div class="gradio-container">
+{generate_header_html()}
+{generate_stats_html()}
+<nav class="nav-row">
+{nav}
+</nav>
+<div style="margin: 3rem 0 1rem 0;"></div>
+<div class="carousel-wrapper">
+<button id="prev-btn" class="carousel-nav-btn">◀</button>
+<div class="carousel-container">
+{render_slides()}
+</div>
+<button id="next-btn" class="carousel-nav-btn">▶</button>
+</div>
+{render_timelines()}
+<p style="text-align: center; color: {COLORS['text_muted']}; font-size: 0.85rem; margin-top: 1rem;">
+    💡 Cliquez sur les points de la timeline ou utilisez les flèches ◀ ▶ pour naviguer
+</p>
+<div style="margin-top: 4rem;"></div>
+<div class="chat-container">
+<div class="chat-header">
+    <img src="{avatar_path}" width="36" height="36" alt="">
+    <span>AI Agent specialized in this profile</span>
+</div>
+<div id="chat-log" class="chat-log chatbot"></div>
+<form id="chat-form" class="chat-form">
+    <input id="msg-input" class="gr-textbox" autocomplete="off" placeholder="Ex: Quels projets multi-agents as-tu réalisés ?">
+    <button id="send-btn" type="submit">➤</button>
+</form>
+<div class="chat-examples">
+{examples}
+</div>
+</div>
+{generate_footer_html(built_with="a static export")}
+</div>
+<script src="{js_path}"></script>
+</body>
+</html>
+"""
+
+
+def export(out_dir: str, backend_url: str) -> dict:
+    """
+    Write the bundle into out_dir and return the asset manifest.
+
+    out_dir is replaced only if it is empty or holds a previous export
+    (its manifest.json), so a mistyped --out cannot wipe another directory.
+    """
+    if os.path.isdir(out_dir) and os.listdir(out_dir):
+        if not os.path.isfile(os.path.join(out_dir, "manifest.json")):
+            raise FileExistsError(f"{out_dir} is not empty and holds no previous export (manifest.json)")
+        shutil.rmtree(out_dir)
+    os.makedirs(os.path.join(out_dir, "assets"), exist_ok=True)
+    manifest = {}
+
+    with open(os.path.join(logos_path, "textures", "metal_brushed.png"), "rb") as f:
+        texture = write_asset(out_dir, "metal_brushed.png", f.read(), manifest)
+    with open(os.path.join(logos_path, "technologies", "wavebot.png"), "rb") as f:
+        avatar = write_asset(out_dir, "wavebot.png", f.read(), manifest)
+
+    # The stylesheet lives in assets/, next to the texture
+    css = CUSTOM_CSS.replace(
+        "/logos/textures/metal_brushed.png", os.path.basename(texture)
+    )
+    css_path = write_asset(out_dir, "portfolio.css", (css + STATIC_CSS).encode("utf-8"), manifest)
+    js_path = write_asset(out_dir, "portfolio.js", STATIC_JS.encode("utf-8"), manifest)
+
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(render_index(css_path, js_path, avatar, backend_url))
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "profile": current_snapshot().name,
+                "language": current_snapshot().language,
+                "version": current_snapshot().version,
+                "assets": manifest,
+            },
+            f,
+            indent=2,
+        )
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--out", default="dist", help="Output directory (replaced if empty or a previous export)"
+    )
+    parser.add_argument(
+        "--backend-url",
+        default="",
+        help="Origin of the Python backend serving /api/chat (default: same origin)",
+    )
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="Portfolio profile to export")
+    parser.add_argument(
+        "--lang",
+        default=PORTFOLIO_LANGUAGE,
+        help="Content language (translations from build_translations.py)",
+    )
+    args = parser.parse_args()
+    if args.lang not in available_languages():
+        parser.error(f"no translations for {args.lang!r}: run build_translations.py --lang {args.lang}")
+
+    try:
+        with use_snapshot(SNAPSHOTS.get(args.profile, args.lang)):
+            manifest = export(args.out, args.backend_url)
+    except FileExistsError as e:
+        parser.error(str(e))
+    print(f"Exported {len(manifest)} assets + index.html to {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Isolation of the pooled CodeAgents' warm Python executor across chat turns"""
+
+import os
+
+import pytest
+
+os.environ.setdefault("USE_HF_MODEL", "true")
+os.environ.setdefault("HF_TOKEN", "test")
+os.environ.setdefault("WARMUP_ENABLED", "false")
+
+app = pytest.importorskip("app")
+pytestmark = pytest.mark.skipif(not app.USE_HF_MODEL, reason="the warm executor is HF-mode only")
+
+from smolagents.local_python_executor import InterpreterError  # noqa: E402
+
+
+@pytest.fixture
+def executor():
+    agent = app.AGENT_POOL.get()
+    try:
+        yield agent.python_executor
+    finally:
+        agent.python_executor.reset_state()
+        app.AGENT_POOL.put(agent)
+
+
+def test_functions_from_a_previous_run_are_dropped(executor):
+    executor.reset_state()
+    executor("secret = 'visitor A'\ndef leak():\n    return secret")
+    assert executor("leak()").output == "visitor A"
+
+    executor.reset_state()
+    with pytest.raises(InterpreterError):
+        executor("leak()")
+    with pytest.raises(InterpreterError):
+        executor("secret")
+
+
+def test_bound_tools_survive_the_reset(executor):
+    executor.reset_state()
+    executor("def list_skills():\n    return 'shadowed'")
+    executor.reset_state()
+    assert "list_skills" in executor.static_tools
+    assert "list_skills" not in executor.custom_tools